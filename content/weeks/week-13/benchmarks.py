@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Benchmarks - Timing you can trust (and compare across commits)
+
+One time.time() around one call measures JIT compiling, cold caches and
+whatever else the machine was doing. A fair benchmark:
+
+1. Warms up until the call stops getting faster (JIT, caches, pools)
+2. Times several runs with time.perf_counter_ns()
+3. Reports the median and the interquartile range (IQR), not one number
+4. Reports throughput (paths/sec), so runs of different sizes compare
+5. Saves JSON with the commit and library versions, to diff against later
+
+Usage:
+    python benchmarks.py                        # run the suite, print a table
+    python benchmarks.py --json before.json     # ...and save the results
+    python benchmarks.py --compare before.json  # speedup vs a saved run
+
+    from benchmarks import measure
+    stats = measure(var_numba, n_sims, weights, mu, sigma, seeds, n_paths=n_sims)
+    stats["median"], stats["iqr"], stats["paths_per_sec"], stats["result"]
+
+    from benchmarks import worker_sweep    # speedup curve over 1..N workers
+    curve = worker_sweep(lambda w: calculate_var_parallel(n_sims, w), 4, name="var")
+"""
+
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import time
+
+import numpy as np
+
+REPEAT = 5             # Timed runs per benchmark
+MAX_WARMUP = 5         # Give up on warming up after this many calls
+WARMUP_TOLERANCE = 0.1  # Warm once a call is no more than 10% faster than the last
+N_SIMS = 2_000_000     # Paths per run (pure Python runs PYTHON_FRACTION of it)
+PYTHON_FRACTION = 0.05
+
+
+def _time_ns(call):
+    """Run call() once: (nanoseconds, result)"""
+    start = time.perf_counter_ns()
+    result = call()
+    return time.perf_counter_ns() - start, result
+
+
+def measure(func, *args, name=None, repeat=REPEAT, warmup=True, n_paths=None,
+            **kwargs):
+    """
+    Benchmark func(*args, **kwargs).
+
+    warmup=True calls the function until one call is no longer more than
+    WARMUP_TOLERANCE faster than the previous one (at most MAX_WARMUP
+    calls); use warmup=False for slow pure-Python runs. Returns a dict of
+    seconds: median, iqr, min, first_call (the first call ever, including
+    any compile time), plus paths_per_sec if n_paths is given and the
+    last call's result.
+    """
+    if repeat < 1:
+        raise ValueError(f"repeat must be at least 1, got {repeat}")
+
+    def call():
+        return func(*args, **kwargs)
+
+    warmup_times = []
+    if warmup:
+        for _ in range(MAX_WARMUP):
+            elapsed, _ = _time_ns(call)
+            warmup_times.append(elapsed)
+            if len(warmup_times) > 1 and elapsed >= (1 - WARMUP_TOLERANCE) * warmup_times[-2]:
+                break
+
+    times = []
+    for _ in range(repeat):
+        elapsed, result = _time_ns(call)
+        times.append(elapsed)
+
+    seconds = np.array(times) / 1e9
+    q1, median, q3 = np.percentile(seconds, [25, 50, 75])
+    stats = {
+        "name": name or func.__name__,
+        "median": float(median),
+        "iqr": float(q3 - q1),
+        "min": float(seconds.min()),
+        "repeat": repeat,
+        "warmup_calls": len(warmup_times),
+        "first_call": (warmup_times[0] if warmup_times else times[0]) / 1e9,
+        "result": result,
+    }
+    if n_paths is not None:
+        stats["n_paths"] = n_paths
+        stats["paths_per_sec"] = n_paths / median
+    return stats
+
+
+def worker_sweep(func, max_workers, *args, name=None, repeat=REPEAT, warmup=True,
+                 n_paths=None, setup=None, **kwargs):
+    """
+    Benchmark func(n_workers, *args, **kwargs) for n_workers = 1 ... max_workers.
+
+    Every point is a measure() dict plus workers, speedup (vs 1 worker)
+    and efficiency (speedup / workers), so a curve prints with
+    print_scaling and saves with save_json. setup(n_workers), if given,
+    runs untimed before each point (e.g. to start a pool of that size).
+    """
+    name = name or func.__name__
+    curve = []
+    for n_workers in range(1, max_workers + 1):
+        if setup is not None:
+            setup(n_workers)
+        stats = measure(func, n_workers, *args, name=f"{name}/{n_workers}w", repeat=repeat,
+                        warmup=warmup, n_paths=n_paths, **kwargs)
+        stats["workers"] = n_workers
+        stats["speedup"] = curve[0]["median"] / stats["median"] if curve else 1.0
+        stats["efficiency"] = stats["speedup"] / n_workers
+        curve.append(stats)
+    return curve
+
+
+def print_scaling(curve):
+    """Speedup and efficiency per worker count, with a bar per point"""
+    print(f"  {'Workers':>7} {'Median':>9} {'IQR':>8} {'Speedup':>8} {'Efficiency':>10}")
+    for stats in curve:
+        bar = "#" * round(20 * min(stats["efficiency"], 1.0))
+        print(f"  {stats['workers']:>7} {stats['median']:>8.2f}s {stats['iqr']:>7.2f}s "
+              f"{stats['speedup']:>7.2f}x {stats['efficiency']:>10.0%}  {bar}")
+
+
+# =============================================================================
+# The week-13 suite
+# =============================================================================
+
+def suite(n_sims=N_SIMS, repeat=REPEAT, n_workers=None, seed=42):
+    """
+    Benchmark the option and VaR kernels on every backend.
+
+    All VaR runs use finance_demo's portfolio. Pure Python runs only
+    PYTHON_FRACTION of the paths - compare them through paths_per_sec.
+    """
+    from finance_demo import (BLOCK_SIZE, MU, SIGMA, WEIGHTS, calculate_var_parallel,
+                              calculate_var_sequential)
+    from numba_demo import NUMBA_AVAILABLE, option_price_python, var_python
+    from option_pricing import price_option_grid
+    from rng_streams import chunk_seeds
+    from worker_pool import get_pool
+
+    S, K, T, r, sigma = 150.0, 155.0, 0.25, 0.05, 0.30
+    n_workers = n_workers or multiprocessing.cpu_count()
+    n_python = max(1, int(n_sims * PYTHON_FRACTION))
+    seeds = chunk_seeds(seed, n_sims)
+
+    cases = [
+        ("option/python", option_price_python, (S, K, T, r, sigma, n_python, seed),
+         n_python, False),
+        ("option/numpy", price_option_grid, (S, [K], [T], r, sigma, n_sims, seed),
+         n_sims, True),
+        ("var/python", var_python, (n_python, WEIGHTS, MU, SIGMA, seed), n_python, False),
+        ("var/numpy", calculate_var_sequential, (n_sims, "block", BLOCK_SIZE, "tail", seed),
+         n_sims, True),
+        ("var/process", calculate_var_parallel,
+         (n_sims, n_workers, "block", BLOCK_SIZE, "tail", seed, get_pool(n_workers)),
+         n_sims, True),
+    ]
+    if NUMBA_AVAILABLE:
+        from numba_demo import option_price_numba, var_numba, var_parallel
+        cases += [
+            ("option/numba", option_price_numba, (S, K, T, r, sigma, n_sims, seeds),
+             n_sims, True),
+            ("var/numba", var_numba, (n_sims, WEIGHTS, MU, SIGMA, seeds), n_sims, True),
+            ("var/numba-parallel", var_parallel, (n_sims, WEIGHTS, MU, SIGMA, seeds),
+             n_sims, True),
+        ]
+
+    results = []
+    for name, func, args, n_paths, warmup in sorted(cases, key=lambda c: c[0]):
+        # Slow pure-Python runs are timed fewer times
+        runs = repeat if warmup else max(1, repeat // 2)
+        stats = measure(func, *args, name=name, repeat=runs, warmup=warmup,
+                        n_paths=n_paths)
+        results.append(stats)
+    return results
+
+
+def environment(commit=True):
+    """
+    Where and on what the benchmark ran: commit, versions, CPU.
+
+    commit=False skips the `git rev-parse` subprocess (commit is None).
+    """
+    if commit:
+        try:
+            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                                    capture_output=True, text=True, check=True,
+                                    cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            commit = None
+    else:
+        commit = None
+    try:
+        import numba
+        numba_version = numba.__version__
+    except ImportError:
+        numba_version = None
+    return {
+        "commit": commit,
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "numba": numba_version,
+        "machine": platform.machine(),
+        "cpu_count": multiprocessing.cpu_count(),
+    }
+
+
+def save_json(results, path, **extra):
+    """Write results (without the raw return values), the environment and any extra keys"""
+    rows = [{k: v for k, v in stats.items() if k != "result"} for stats in results]
+    with open(path, "w") as f:
+        json.dump({"environment": environment(), "results": rows, **extra}, f, indent=2)
+
+
+def load_json(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def compare(baseline, results):
+    """
+    Speedup of each benchmark vs a saved run: {name: baseline / current}.
+
+    Compares throughput when both runs have it (so different n_sims still
+    compare), otherwise the median time. Benchmarks missing from either
+    side are skipped.
+    """
+    old = {row["name"]: row for row in baseline["results"]}
+    speedups = {}
+    for row in results:
+        before = old.get(row["name"])
+        if before is None:
+            continue
+        if "paths_per_sec" in row and "paths_per_sec" in before:
+            speedups[row["name"]] = row["paths_per_sec"] / before["paths_per_sec"]
+        else:
+            speedups[row["name"]] = before["median"] / row["median"]
+    return speedups
+
+
+def print_table(results, speedups=None):
+    print(f"  {'Benchmark':<20} {'Median':>9} {'IQR':>8} {'First call':>10} "
+          f"{'Paths/sec':>12}" + (f" {'vs base':>8}" if speedups else ""))
+    for stats in results:
+        line = (f"  {stats['name']:<20} {stats['median']:>8.3f}s {stats['iqr']:>7.3f}s "
+                f"{stats['first_call']:>9.3f}s {stats.get('paths_per_sec', 0):>12,.0f}")
+        if speedups:
+            ratio = speedups.get(stats["name"])
+            line += f" {ratio:>7.2f}x" if ratio is not None else f" {'new':>8}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the week-13 kernels")
+    parser.add_argument("--sims", type=int, default=N_SIMS, help="paths per run")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per benchmark")
+    parser.add_argument("--workers", type=int, default=None, help="process pool size")
+    parser.add_argument("--json", metavar="PATH", help="save the results as JSON")
+    parser.add_argument("--compare", metavar="PATH", help="saved JSON run to compare against")
+    args = parser.parse_args()
+
+    print("\n" + "="*60)
+    print(" WEEK 13 BENCHMARKS")
+    print("="*60)
+    print(f"\n{args.sims:,} paths per run, median of {args.repeat} runs\n")
+
+    results = suite(args.sims, args.repeat, args.workers)
+    speedups = compare(load_json(args.compare), results) if args.compare else None
+    print_table(results, speedups)
+    if args.json:
+        save_json(results, args.json)
+        print(f"\n  Saved to {args.json}")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,6 +7,12 @@ import numpy as np
 import time
 from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 
+from option_pricing import price_option_grid
+from rng_streams import CHUNK_SIZE, chunk_rng
+from worker_pool import get_pool
+
+SEED = 42
+
 # =============================================================================
 # EXERCISE 1: Slow Downloads (I/O-bound)
 # =============================================================================
@@ -34,11 +40,20 @@ def slow_sum(n):
 # =============================================================================
 
 def price_option(args):
-    """Monte Carlo option pricing"""
-    S, K, T, r, sigma, n_sims = args
+    """
+    Monte Carlo option pricing.
+
+    args = (S, K, T, r, sigma, n_sims) or (S, K, T, r, sigma, n_sims, seed).
+    Draws come from the rng_streams chunk streams, so forked workers never
+    share random numbers and the same seed gives the same price.
+    """
+    S, K, T, r, sigma, n_sims, *rest = args
+    seed = rest[0] if rest else None
     total = 0.0
-    for _ in range(n_sims):
-        Z = np.random.randn()
+    for i in range(n_sims):
+        if i % CHUNK_SIZE == 0:
+            rng = chunk_rng(seed, i // CHUNK_SIZE)
+        Z = rng.standard_normal()
         ST = S * np.exp((r - 0.5*sigma**2)*T + sigma*np.sqrt(T)*Z)
         total += max(ST - K, 0)
     return np.exp(-r * T) * total / n_sims
@@ -78,6 +93,16 @@ if __name__ == '__main__':
         print(r)
     print(f"Time: {time.time() - start:.1f}s")  # ~1 second
 
+    # SOLUTION 2: asyncio — one thread, no matter how many tickers
+    # (semaphore limit, timeouts and retries: see async_fetch.py)
+    from async_fetch import download_all, make_tickers
+
+    print("\n=== Exercise 1: asyncio, 10,000 tickers ===")
+    start = time.time()
+    results = download_all(make_tickers(10_000))
+    print(results[0])
+    print(f"Time: {time.time() - start:.1f}s")  # ~1 second, still
+
     # Sequential version
     print("\n=== Exercise 2: Sequential ===")
     start = time.time()
@@ -104,7 +129,9 @@ if __name__ == '__main__':
 
     from numba import njit
 
-    @njit
+    # Explicit signature: compiled right here, not at the first call.
+    # cache=True: later runs load the machine code from __pycache__.
+    @njit("float64(int64)", cache=True)
     def fast_sum(n):
         total = 0.0  # Use float to avoid integer overflow
         for i in range(n):
@@ -112,7 +139,6 @@ if __name__ == '__main__':
         return total
 
     print("\n=== Exercise 3: Numba ===")
-    fast_sum(100)  # Warmup / compile
     start = time.time()
     result = fast_sum(50_000_000)  # 10x more iterations!
     print(f"Result: {result}")
@@ -138,7 +164,7 @@ if __name__ == '__main__':
     print(f"Time: {time.time() - start:.2f}s")
 
     # SOLUTION: with @njit
-    @njit
+    @njit("float64(int64)", cache=True)
     def estimate_pi_fast(n):
         inside = 0
         for _ in range(n):
@@ -149,7 +175,6 @@ if __name__ == '__main__':
         return 4 * inside / n
 
     print("\n=== Exercise 4: Fast Pi ===")
-    estimate_pi_fast(1000)  # Warmup
     start = time.time()
     pi = estimate_pi_fast(10_000_000)  # 10x more!
     print(f"π ≈ {pi:.6f}")
@@ -158,18 +183,28 @@ if __name__ == '__main__':
     # Price one option
     print("\n=== Exercise 5: Single Option ===")
     start = time.time()
-    price = price_option((100, 100, 1.0, 0.05, 0.2, 1_000_000))
+    price = price_option((100, 100, 1.0, 0.05, 0.2, 1_000_000, SEED))
     print(f"Option price: ${price:.2f}")
     print(f"Time: {time.time() - start:.2f}s")
 
     # SOLUTION: Price 8 options in parallel
     print("\n=== Exercise 5: 8 Options Parallel ===")
     strikes = [80, 85, 90, 95, 100, 105, 110, 115]
-    args_list = [(100, K, 1.0, 0.05, 0.2, 1_000_000) for K in strikes]
+    args_list = [(100, K, 1.0, 0.05, 0.2, 1_000_000, SEED) for K in strikes]
 
+    # get_pool() keeps the same 4 processes (NumPy already imported) for
+    # every later exercise instead of starting a new pool each time
     start = time.time()
-    with ProcessPoolExecutor(max_workers=4) as pool:
-        prices = list(pool.map(price_option, args_list))
+    prices = list(get_pool(4).map(price_option, args_list))
+
+    for K, p in zip(strikes, prices):
+        print(f"Strike ${K}: ${p:.2f}")
+    print(f"Time: {time.time() - start:.2f}s")
+
+    # SOLUTION 2: Simulate the stock ONCE, evaluate all 8 strikes on it
+    print("\n=== Exercise 5: 8 Options, One Simulation ===")
+    start = time.time()
+    prices = price_option_grid(100, strikes, [1.0], 0.05, 0.2, 1_000_000, seed=SEED)[0]
 
     for K, p in zip(strikes, prices):
         print(f"Strike ${K}: ${p:.2f}")
@@ -181,7 +216,7 @@ if __name__ == '__main__':
 
     from numba import prange
 
-    @njit(parallel=True)
+    @njit("float64(int64)", parallel=True, cache=True)
     def estimate_pi_parallel(n):
         inside = 0
         for _ in prange(n):  # prange instead of range!
@@ -192,7 +227,6 @@ if __name__ == '__main__':
         return 4 * inside / n
 
     print("\n=== Exercise 6: Numba Parallel ===")
-    estimate_pi_parallel(1000)  # Warmup
     start = time.time()
     pi = estimate_pi_parallel(100_000_000)  # 100 million!
     print(f"π ≈ {pi:.6f}")
@@ -201,6 +235,5 @@ if __name__ == '__main__':
     print("\n=== Bonus: Watch btop ===")
     print("Starting... watch your CPU monitor!")
     start = time.time()
-    with ProcessPoolExecutor(max_workers=4) as pool:
-        list(pool.map(burn_cpu, range(4)))
+    list(get_pool(4).map(burn_cpu, range(4)))
     print(f"Done! Time: {time.time() - start:.1f}s")
@@ -7,11 +7,29 @@ Demonstrates how @njit makes financial simulations 50-150x faster.
 Usage:
     pip install numba numpy  # if not installed
     python numba_demo.py
+    python numba_demo.py --backend numba numba-parallel --workers 8 --json numba.json
 """
 
-import time
+import argparse
 import numpy as np
 
+from benchmarks import REPEAT, measure, print_scaling, save_json, worker_sweep
+from risk_models import constant_correlation_cov, cholesky_model
+from rng_streams import CHUNK_SIZE, chunk_rng, chunk_seeds, resolve_seed
+
+SEED = 42  # Every run of the demo draws the same random streams
+BACKENDS = ("python", "numba", "numba-parallel")
+
+# Explicit signatures compile every kernel once, when the module is imported.
+# cache=True saves the machine code to __pycache__, so later runs load it in
+# milliseconds instead of recompiling (see jit_startup.py).
+_PARAMS = "float64, float64, float64, float64, float64, int64, uint32[::1]"
+OPTION_SIG = f"float64({_PARAMS})"
+OPTION_VR_SIG = f"UniTuple(float64, 2)({_PARAMS})"
+VAR_SIG = "float64(int64, float64[::1], float64[::1], float64[::1], uint32[::1])"
+VAR_CORRELATED_SIG = ("float64(int64, float64[::1], float64[::1], float64[:, ::1], "
+                      "float64[::1], uint32[::1])")
+
 try:
     from numba import njit, prange
     NUMBA_AVAILABLE = True
@@ -25,7 +43,7 @@ except ImportError:
 # Example 1: Monte Carlo Option Pricing
 # =============================================================================
 
-def option_price_python(S, K, T, r, sigma, n_sims):
+def option_price_python(S, K, T, r, sigma, n_sims, seed=None):
     """
     Price a European call option using Monte Carlo.
     Pure Python version (SLOW).
@@ -35,11 +53,14 @@ def option_price_python(S, K, T, r, sigma, n_sims):
     T: Time to expiry (years)
     r: Risk-free rate
     sigma: Volatility
+    seed: Seed for the per-chunk random streams (see rng_streams.py)
     """
     total_payoff = 0.0
-    for _ in range(n_sims):
+    for i in range(n_sims):
+        if i % CHUNK_SIZE == 0:
+            rng = chunk_rng(seed, i // CHUNK_SIZE)
         # Simulate stock price at expiry
-        Z = np.random.randn()
+        Z = rng.standard_normal()
         ST = S * np.exp((r - 0.5*sigma**2)*T + sigma*np.sqrt(T)*Z)
         # Call option payoff
         total_payoff += max(ST - K, 0)
@@ -49,11 +70,17 @@ def option_price_python(S, K, T, r, sigma, n_sims):
 
 
 if NUMBA_AVAILABLE:
-    @njit
-    def option_price_numba(S, K, T, r, sigma, n_sims):
-        """Same function, but with @njit - 100x faster!"""
+    @njit(OPTION_SIG, cache=True)
+    def option_price_numba(S, K, T, r, sigma, n_sims, seeds):
+        """
+        Same function, but with @njit - 100x faster!
+
+        seeds: one seed per chunk of CHUNK_SIZE paths (rng_streams.chunk_seeds)
+        """
         total_payoff = 0.0
-        for _ in range(n_sims):
+        for i in range(n_sims):
+            if i % CHUNK_SIZE == 0:
+                np.random.seed(seeds[i // CHUNK_SIZE])
             Z = np.random.randn()
             ST = S * np.exp((r - 0.5*sigma**2)*T + sigma*np.sqrt(T)*Z)
             total_payoff += max(ST - K, 0)
@@ -64,7 +91,7 @@ if NUMBA_AVAILABLE:
 # Example 2: Portfolio VaR Simulation
 # =============================================================================
 
-def var_python(n_sims, weights, mu, sigma):
+def var_python(n_sims, weights, mu, sigma, seed=None):
     """
     Calculate 95% Value at Risk using Monte Carlo.
     Pure Python version (SLOW).
@@ -73,8 +100,10 @@ def var_python(n_sims, weights, mu, sigma):
     returns = np.empty(n_sims)
 
     for i in range(n_sims):
+        if i % CHUNK_SIZE == 0:
+            rng = chunk_rng(seed, i // CHUNK_SIZE)
         # Simulate returns for each asset
-        asset_returns = np.random.randn(n_assets) * sigma + mu
+        asset_returns = rng.standard_normal(n_assets) * sigma + mu
         # Portfolio return
         returns[i] = np.dot(weights, asset_returns)
 
@@ -84,52 +113,295 @@ def var_python(n_sims, weights, mu, sigma):
 
 
 if NUMBA_AVAILABLE:
-    @njit
-    def var_numba(n_sims, weights, mu, sigma):
+    @njit(VAR_SIG, cache=True)
+    def var_numba(n_sims, weights, mu, sigma, seeds):
         """Same VaR calculation with @njit"""
         n_assets = len(weights)
         returns = np.empty(n_sims)
 
         for i in range(n_sims):
+            if i % CHUNK_SIZE == 0:
+                np.random.seed(seeds[i // CHUNK_SIZE])
             asset_returns = np.random.randn(n_assets) * sigma + mu
             returns[i] = np.dot(weights, asset_returns)
 
         returns.sort()
         return returns[int(n_sims * 0.05)]
 
-    @njit(parallel=True)
-    def var_parallel(n_sims, weights, mu, sigma):
+    @njit(VAR_SIG, parallel=True, cache=True)
+    def var_parallel(n_sims, weights, mu, sigma, seeds):
         """VaR with parallel=True - uses all CPU cores!"""
         n_assets = len(weights)
         returns = np.empty(n_sims)
 
-        for i in prange(n_sims):  # prange = parallel range
-            asset_returns = np.random.randn(n_assets) * sigma + mu
-            returns[i] = np.dot(weights, asset_returns)
+        # prange = parallel range, one chunk (and random stream) per iteration.
+        # A chunk runs start to finish on one thread, so reseeding that
+        # thread's generator makes the result independent of thread count.
+        for c in prange(len(seeds)):
+            np.random.seed(seeds[c])
+            for i in range(c * CHUNK_SIZE, min((c + 1) * CHUNK_SIZE, n_sims)):
+                asset_returns = np.random.randn(n_assets) * sigma + mu
+                returns[i] = np.dot(weights, asset_returns)
 
         returns.sort()
         return returns[int(n_sims * 0.05)]
 
+    @njit(VAR_CORRELATED_SIG, parallel=True, cache=True)
+    def var_parallel_correlated(n_sims, weights, mu, loadings, specific, seeds):
+        """
+        Parallel VaR with correlated assets (see risk_models.py):
+        asset_returns = mu + loadings @ z + specific * e
+
+        loadings is a Cholesky factor (n x n, O(n^2) per path) or factor
+        loadings (n x k, O(n*k) per path).
+        """
+        n_assets, n_factors = loadings.shape
+        has_specific = np.any(specific != 0.0)
+        returns = np.empty(n_sims)
 
-def time_function(func, *args, warmup=True):
-    """Time a function, with warmup for JIT compilation"""
-    if warmup and NUMBA_AVAILABLE:
-        # Warmup call with small input
+        for c in prange(len(seeds)):
+            np.random.seed(seeds[c])
+            for i in range(c * CHUNK_SIZE, min((c + 1) * CHUNK_SIZE, n_sims)):
+                asset_returns = mu + np.dot(loadings, np.random.randn(n_factors))
+                if has_specific:
+                    asset_returns += np.random.randn(n_assets) * specific
+                returns[i] = np.dot(weights, asset_returns)
+
+        returns.sort()
+        return returns[int(n_sims * 0.05)]
+
+    def var_correlated(n_sims, weights, model, seed=None):
+        """Run var_parallel_correlated for a risk_models.RiskModel"""
+        n_assets = len(model.mu)
+        loadings = model.loadings
+        if loadings is None:
+            loadings = np.zeros((n_assets, 1))
+        specific = model.specific
+        if specific is None:
+            specific = np.zeros(n_assets)
+        return var_parallel_correlated(
+            n_sims, weights, model.mu, np.ascontiguousarray(loadings),
+            specific, chunk_seeds(resolve_seed(seed), n_sims)
+        )
+
+
+# =============================================================================
+# Example 3: Variance Reduction
+# =============================================================================
+# Each kernel returns (mean payoff, variance of that mean). A method that
+# cuts the variance by 10x needs 10x fewer paths for the same accuracy.
+
+VR_METHODS = ("plain", "antithetic", "control", "sobol")
+SOBOL_REPLICATES = 16  # Independent scrambles behind the Sobol error estimate
+
+
+def vr_paths(n_sims, method, n_replicates=SOBOL_REPLICATES):
+    """
+    Paths a method actually prices out of a budget of n_sims.
+
+    Sobol needs a power of two per scramble, so it rounds down to
+    n_replicates * 2**k <= n_sims; the other methods use n_sims.
+    """
+    if method != "sobol":
+        return n_sims
+    if n_sims < n_replicates:
+        raise ValueError(f"Sobol needs n_sims >= n_replicates ({n_replicates}), got {n_sims}")
+    return n_replicates * 2 ** int(np.log2(n_sims // n_replicates))
+
+if NUMBA_AVAILABLE:
+    @njit(OPTION_VR_SIG, cache=True)
+    def option_plain_numba(S, K, T, r, sigma, n_sims, seeds):
+        """Plain Monte Carlo, one path per normal draw"""
+        drift = (r - 0.5*sigma**2)*T
+        vol = sigma*np.sqrt(T)
+        s1 = 0.0
+        s2 = 0.0
+        for i in range(n_sims):
+            if i % CHUNK_SIZE == 0:
+                np.random.seed(seeds[i // CHUNK_SIZE])
+            x = max(S * np.exp(drift + vol*np.random.randn()) - K, 0.0)
+            s1 += x
+            s2 += x * x
+        mean = s1 / n_sims
+        return mean, (s2 - n_sims*mean*mean) / (n_sims - 1) / n_sims
+
+    @njit(OPTION_VR_SIG, cache=True)
+    def option_antithetic_numba(S, K, T, r, sigma, n_sims, seeds):
+        """Antithetic variates: every Z is paired with -Z (n_sims/2 pairs)"""
+        drift = (r - 0.5*sigma**2)*T
+        vol = sigma*np.sqrt(T)
+        n_pairs = n_sims // 2
+        s1 = 0.0
+        s2 = 0.0
+        for i in range(n_pairs):
+            if i % CHUNK_SIZE == 0:
+                np.random.seed(seeds[i // CHUNK_SIZE])
+            Z = np.random.randn()
+            up = max(S * np.exp(drift + vol*Z) - K, 0.0)
+            down = max(S * np.exp(drift - vol*Z) - K, 0.0)
+            x = 0.5 * (up + down)
+            s1 += x
+            s2 += x * x
+        mean = s1 / n_pairs
+        return mean, (s2 - n_pairs*mean*mean) / (n_pairs - 1) / n_pairs
+
+    @njit(OPTION_VR_SIG, cache=True)
+    def option_control_numba(S, K, T, r, sigma, n_sims, seeds):
+        """
+        Control variate: the terminal price S_T itself.
+
+        Under Black-Scholes E[S_T] = S*exp(rT) exactly, so any error in the
+        simulated mean of S_T tells us how to correct the payoff mean.
+        """
+        drift = (r - 0.5*sigma**2)*T
+        vol = sigma*np.sqrt(T)
+        sx = 0.0
+        sc = 0.0
+        sxx = 0.0
+        scc = 0.0
+        sxc = 0.0
+        for i in range(n_sims):
+            if i % CHUNK_SIZE == 0:
+                np.random.seed(seeds[i // CHUNK_SIZE])
+            c = S * np.exp(drift + vol*np.random.randn())
+            x = max(c - K, 0.0)
+            sx += x
+            sc += c
+            sxx += x * x
+            scc += c * c
+            sxc += x * c
+        n = n_sims
+        mx = sx / n
+        mc = sc / n
+        var_x = (sxx - n*mx*mx) / (n - 1)
+        var_c = (scc - n*mc*mc) / (n - 1)
+        cov = (sxc - n*mx*mc) / (n - 1)
+        beta = cov / var_c
+        mean = mx - beta * (mc - S*np.exp(r*T))
+        return mean, (var_x - cov*cov/var_c) / n
+
+    @njit("float64(float64, float64, float64, float64, float64, float64[::1])", cache=True)
+    def option_mean_from_normals(S, K, T, r, sigma, Z):
+        """Mean call payoff for a given array of normal draws"""
+        drift = (r - 0.5*sigma**2)*T
+        vol = sigma*np.sqrt(T)
+        total = 0.0
+        for i in range(len(Z)):
+            total += max(S * np.exp(drift + vol*Z[i]) - K, 0.0)
+        return total / len(Z)
+
+    def option_sobol_numba(S, K, T, r, sigma, n_sims, seed, n_replicates=SOBOL_REPLICATES):
+        """
+        Scrambled Sobol points instead of pseudo-random draws (needs scipy).
+
+        Quasi-random points fill [0, 1) evenly. We run n_replicates
+        independent scrambles and use their spread as the error estimate.
+        Only vr_paths(n_sims, "sobol") paths are used (powers of two).
+        """
         try:
-            if 'n_sims' in func.__code__.co_varnames:
-                func(*args[:1], *args[1:])
-            else:
-                func(*args)
-        except:
-            pass
+            from scipy.special import ndtri
+            from scipy.stats import qmc
+        except ImportError:
+            raise ImportError("Sobol sampling needs scipy. Run: pip install scipy")
+
+        log2_m = int(np.log2(vr_paths(n_sims, "sobol", n_replicates) // n_replicates))
+        means = np.empty(n_replicates)
+        for k in range(n_replicates):
+            sobol = qmc.Sobol(d=1, scramble=True, seed=chunk_rng(seed, k))
+            Z = ndtri(sobol.random_base2(log2_m)[:, 0])
+            means[k] = option_mean_from_normals(S, K, T, r, sigma, Z)
+        return means.mean(), means.var(ddof=1) / n_replicates
+
+    def option_price_vr(S, K, T, r, sigma, n_sims, method="plain", seed=None):
+        """Price a European call with a variance-reduction method: (price, std error)"""
+        seed = resolve_seed(seed)
+        seeds = chunk_seeds(seed, n_sims)
+        if method == "plain":
+            mean, var = option_plain_numba(S, K, T, r, sigma, n_sims, seeds)
+        elif method == "antithetic":
+            mean, var = option_antithetic_numba(S, K, T, r, sigma, n_sims, seeds)
+        elif method == "control":
+            mean, var = option_control_numba(S, K, T, r, sigma, n_sims, seeds)
+        elif method == "sobol":
+            mean, var = option_sobol_numba(S, K, T, r, sigma, n_sims, seed)
+        else:
+            raise ValueError(f"Unknown method: {method!r} (use one of {VR_METHODS})")
+        discount = np.exp(-r * T)
+        return discount * mean, discount * np.sqrt(var)
+
+    def variance_reduction_report(S, K, T, r, sigma, n_sims, seed=None):
+        """
+        Price with every method on the same path budget.
+
+        vrf = variance per path of plain MC / variance per path of the
+        method, i.e. how many times fewer paths the method needs for the
+        same standard error. Per path, because Sobol may use fewer paths
+        than the budget ("paths" in the report).
+        """
+        _, plain_se = option_price_vr(S, K, T, r, sigma, n_sims, "plain", seed)
+        report = {}
+        for method in VR_METHODS:
+            price, se = option_price_vr(S, K, T, r, sigma, n_sims, method, seed)
+            paths = vr_paths(n_sims, method)
+            vrf = (plain_se**2 * n_sims) / (se**2 * paths)
+            report[method] = {"price": price, "se": se, "paths": paths, "vrf": vrf}
+        return report
 
-    start = time.time()
-    result = func(*args)
-    elapsed = time.time() - start
-    return elapsed, result
 
+def time_function(func, *args, warmup=True):
+    """
+    (median seconds, result) of func(*args), timed with benchmarks.measure.
+
+    warmup=False is for slow pure-Python runs: no warmup, one timed run.
+    """
+    stats = measure(func, *args, warmup=warmup, repeat=REPEAT if warmup else 1)
+    return stats["median"], stats["result"]
+
+
+def thread_scaling(n_sims, weights, mu, sigma, seeds, max_threads=None, repeat=REPEAT):
+    """
+    var_parallel on 1, 2, ... max_threads Numba threads.
+
+    The thread count is set with numba.set_num_threads before every point
+    (it can't exceed NUMBA_NUM_THREADS, the size of Numba's thread pool)
+    and restored afterwards. Returns benchmarks.worker_sweep's list.
+    """
+    import numba
+    limit = numba.config.NUMBA_NUM_THREADS
+    max_threads = min(max_threads or limit, limit)
+    try:
+        return worker_sweep(lambda n_threads: var_parallel(n_sims, weights, mu, sigma, seeds),
+                            max_threads, name="var/numba-parallel", repeat=repeat,
+                            n_paths=n_sims, setup=numba.set_num_threads)
+    finally:
+        numba.set_num_threads(limit)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Numba finance demo and benchmark")
+    parser.add_argument("--sims", type=int, default=None,
+                        help="paths per run (default: 1M for options, 5M for VaR)")
+    parser.add_argument("--backend", nargs="+", choices=BACKENDS, default=list(BACKENDS),
+                        help="implementations to run (default: all)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="sweep var_parallel over 1..WORKERS threads (default: all)")
+    parser.add_argument("--repeat", type=int, default=REPEAT, help="timed runs per benchmark")
+    parser.add_argument("--json", metavar="PATH", help="save the results as JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    backends = set(args.backend) if NUMBA_AVAILABLE else {"python"}
+    results = []
+
+    def timed(name, func, *args_, warmup=True, n_paths=None):
+        """time_function, keeping every measurement for --json"""
+        stats = measure(func, *args_, name=name, warmup=warmup,
+                        repeat=args.repeat if warmup else 1, n_paths=n_paths)
+        results.append(stats)
+        return stats["median"], stats["result"]
 
-def main():
     print("=" * 60)
     print(" NUMBA FINANCE DEMO - JIT Compilation")
     print("=" * 60)
@@ -137,74 +409,121 @@ def main():
     # -----------------------------------------------------------------
     # Example 1: Option Pricing
     # -----------------------------------------------------------------
-    print("\n[Example 1: Monte Carlo Option Pricing]")
-    print("-" * 45)
-    print("Pricing AAPL $155 call, 3 months to expiry")
-    print("Using 1 million Monte Carlo simulations\n")
-
     # Option parameters
     S, K, T, r, sigma = 150, 155, 0.25, 0.05, 0.30
-    n_sims = 1_000_000
+    n_sims = args.sims or 1_000_000
 
-    # Python version
-    print("Running pure Python...")
-    t_python, price_python = time_function(
-        option_price_python, S, K, T, r, sigma, n_sims, warmup=False
-    )
-    print(f"  Pure Python: {t_python:.2f}s  (price: ${price_python:.2f})")
+    print("\n[Example 1: Monte Carlo Option Pricing]")
+    print("-" * 45)
+    print("Pricing AAPL $155 call, 3 months to expiry")
+    print(f"Using {n_sims:,} Monte Carlo simulations\n")
+
+    if "python" in backends:
+        # Python version
+        print("Running pure Python...")
+        t_python, price_python = timed(
+            "option/python", option_price_python, S, K, T, r, sigma, n_sims, SEED,
+            warmup=False, n_paths=n_sims
+        )
+        print(f"  Pure Python: {t_python:.2f}s  (price: ${price_python:.2f})")
 
-    if NUMBA_AVAILABLE:
+    if "numba" in backends:
         # Numba version
         print("Running Numba @njit...")
-        t_numba, price_numba = time_function(
-            option_price_numba, S, K, T, r, sigma, n_sims
+        t_numba, price_numba = timed(
+            "option/numba", option_price_numba, S, K, T, r, sigma, n_sims,
+            chunk_seeds(SEED, n_sims), n_paths=n_sims
         )
         print(f"  Numba @njit: {t_numba:.2f}s  (price: ${price_numba:.2f})")
-        print(f"  Speedup:     {t_python/t_numba:.0f}x faster!")
+        if "python" in backends:
+            print(f"  Speedup:     {t_python/t_numba:.0f}x faster!")
 
     # -----------------------------------------------------------------
     # Example 2: Portfolio VaR
     # -----------------------------------------------------------------
-    print("\n[Example 2: Portfolio Value at Risk]")
-    print("-" * 45)
-    print("$1M portfolio, 10 assets, 5 million simulations\n")
-
     # Portfolio setup
     np.random.seed(42)
     n_assets = 10
     weights = np.random.dirichlet(np.ones(n_assets))
     mu = np.random.uniform(0.0001, 0.001, n_assets)
     sigma = np.random.uniform(0.01, 0.03, n_assets)
-    n_sims = 5_000_000
+    n_sims = args.sims or 5_000_000
     portfolio_value = 1_000_000
+    seeds = chunk_seeds(SEED, n_sims)
 
-    # Python version
-    print("Running pure Python (this will take a while)...")
-    t_python, var_py = time_function(
-        var_python, n_sims, weights, mu, sigma, warmup=False
-    )
-    loss_py = portfolio_value * abs(var_py)
-    print(f"  Pure Python: {t_python:.1f}s  (95% VaR: ${loss_py:,.0f})")
+    print("\n[Example 2: Portfolio Value at Risk]")
+    print("-" * 45)
+    print(f"$1M portfolio, 10 assets, {n_sims:,} simulations\n")
+
+    if "python" in backends:
+        # Python version
+        print("Running pure Python (this will take a while)...")
+        t_python, var_py = timed(
+            "var/python", var_python, n_sims, weights, mu, sigma, SEED,
+            warmup=False, n_paths=n_sims
+        )
+        loss_py = portfolio_value * abs(var_py)
+        print(f"  Pure Python: {t_python:.1f}s  (95% VaR: ${loss_py:,.0f})")
 
-    if NUMBA_AVAILABLE:
+    if "numba" in backends:
         # Numba version
         print("Running Numba @njit...")
-        t_numba, var_nb = time_function(
-            var_numba, n_sims, weights, mu, sigma
+        t_numba, var_nb = timed(
+            "var/numba", var_numba, n_sims, weights, mu, sigma, seeds, n_paths=n_sims
         )
         loss_nb = portfolio_value * abs(var_nb)
         print(f"  Numba @njit: {t_numba:.2f}s  (95% VaR: ${loss_nb:,.0f})")
-        print(f"  Speedup:     {t_python/t_numba:.0f}x faster!")
+        if "python" in backends:
+            print(f"  Speedup:     {t_python/t_numba:.0f}x faster!")
 
-        # Parallel version
+    if "numba-parallel" in backends:
+        # Parallel version, on 1, 2, ... threads
         print("\nRunning Numba parallel=True...")
-        t_parallel, var_par = time_function(
-            var_parallel, n_sims, weights, mu, sigma
-        )
+        curve = thread_scaling(n_sims, weights, mu, sigma, seeds, args.workers, args.repeat)
+        results.extend(curve)
+        t_parallel, var_par = curve[-1]["median"], curve[-1]["result"]
         loss_par = portfolio_value * abs(var_par)
-        print(f"  Parallel:    {t_parallel:.2f}s  (95% VaR: ${loss_par:,.0f})")
-        print(f"  vs Python:   {t_python/t_parallel:.0f}x faster!")
-        print(f"  vs Numba:    {t_numba/t_parallel:.1f}x faster!")
+        print(f"  Parallel:    {t_parallel:.2f}s  (95% VaR: ${loss_par:,.0f}, "
+              f"{curve[-1]['workers']} thread(s))")
+        if "python" in backends:
+            print(f"  vs Python:   {t_python/t_parallel:.0f}x faster!")
+        if "numba" in backends:
+            print(f"  vs Numba:    {t_numba/t_parallel:.1f}x faster!")
+        print()
+        print_scaling(curve)
+
+        # Correlated assets
+        print("\nRunning parallel with 30% correlated assets (Cholesky)...")
+        model = cholesky_model(mu, constant_correlation_cov(sigma, 0.3))
+        t_corr, var_corr = timed(
+            "var/numba-correlated", var_correlated, n_sims, weights, model, SEED,
+            n_paths=n_sims
+        )
+        loss_corr = portfolio_value * abs(var_corr)
+        print(f"  Correlated:  {t_corr:.2f}s  (95% VaR: ${loss_corr:,.0f})")
+
+    # -----------------------------------------------------------------
+    # Example 3: Variance Reduction
+    # -----------------------------------------------------------------
+    if "numba" in backends:
+        n_sims = args.sims or 1_000_000
+        print("\n[Example 3: Variance Reduction]")
+        print("-" * 45)
+        print(f"Same $155 call, {n_sims:,} paths per method\n")
+
+        S, K, T, r, sigma = 150, 155, 0.25, 0.05, 0.30
+        try:
+            report = variance_reduction_report(S, K, T, r, sigma, n_sims, SEED)
+        except ImportError as e:  # Sobol needs scipy
+            print(f"  {e}")
+        else:
+            for method, row in report.items():
+                print(f"  {method:<11} ${row['price']:.4f} +/- {row['se']:.4f}"
+                      f"   variance reduction: {row['vrf']:6.1f}x   ({row['paths']:,} paths)")
+
+    if args.json:
+        save_json(results, args.json)
+        print(f"\nSaved to {args.json}")
 
     # -----------------------------------------------------------------
     # Summary
@@ -216,7 +535,7 @@ def main():
 1. @njit decorator: Same Python code, 50-150x faster
 2. Works great for: loops, NumPy, financial simulations
 3. parallel=True + prange: automatic multi-core execution
-4. First call compiles (slow), subsequent calls are fast
+4. Compiling is slow: cache=True keeps the machine code for the next run
 
 Use cases in finance:
 - Option pricing (Monte Carlo)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Path-Dependent Options - Asian, barrier and lookback without the big matrix
+
+An Asian option depends on the average price along the path, so we need
+every step, not just S_T. The naive way stores an (n_paths x n_steps)
+matrix: 1M paths x 252 days = 2 GB. Instead we simulate a block of paths
+one time step at a time and keep only running aggregates per path:
+
+    running sum  -> Asian (average price) call
+    running max  -> up-and-out barrier call
+    running min  -> lookback (floating strike) call
+
+Memory is O(block size) per thread, whatever n_paths and n_steps are.
+
+Usage:
+    pip install numba numpy  # numba optional, but much faster
+    python path_engine.py
+"""
+
+import time
+
+import numpy as np
+
+from rng_streams import chunk_rng, chunk_seeds, n_chunks, resolve_seed
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+EXOTIC_STYLES = ("asian", "barrier", "lookback")
+PATH_BLOCK = 4096  # Paths simulated together (the running state fits in cache)
+# Compiled at import and cached on disk, like the kernels in numba_demo.py
+EXOTIC_SUMS_SIG = ("UniTuple(float64[::1], 2)(float64, float64, float64, float64, float64, "
+                   "int64, int64, float64, uint32[::1])")
+
+
+def _block_payoffs_numpy(S, K, barrier, drift, vol, n_paths, n_steps, rng):
+    """Simulate one block of paths step by step (NumPy fallback)"""
+    price = np.full(n_paths, float(S))
+    total = np.zeros(n_paths)
+    high = price.copy()
+    low = price.copy()
+    for _ in range(n_steps):
+        price *= np.exp(drift + vol * rng.standard_normal(n_paths))
+        total += price
+        np.maximum(high, price, out=high)
+        np.minimum(low, price, out=low)
+    asian = np.maximum(total / n_steps - K, 0.0)
+    knocked_out = high >= barrier
+    up_and_out = np.where(knocked_out, 0.0, np.maximum(price - K, 0.0))
+    lookback = price - low
+    return np.stack([asian, up_and_out, lookback])
+
+
+def exotic_sums_numpy(S, K, T, r, sigma, n_paths, n_steps, barrier, seed):
+    """Sum and sum of squares of every exotic payoff, NumPy version"""
+    dt = T / n_steps
+    drift = (r - 0.5 * sigma**2) * dt
+    vol = sigma * np.sqrt(dt)
+    sums = np.zeros(3)
+    sq_sums = np.zeros(3)
+    for c in range(n_chunks(n_paths, PATH_BLOCK)):
+        n = min(PATH_BLOCK, n_paths - c * PATH_BLOCK)
+        payoffs = _block_payoffs_numpy(S, K, barrier, drift, vol, n, n_steps,
+                                       chunk_rng(seed, c))
+        sums += payoffs.sum(axis=1)
+        sq_sums += (payoffs * payoffs).sum(axis=1)
+    return sums, sq_sums
+
+
+if NUMBA_AVAILABLE:
+    @njit(EXOTIC_SUMS_SIG, parallel=True, cache=True)
+    def exotic_sums_numba(S, K, T, r, sigma, n_paths, n_steps, barrier, seeds):
+        """
+        Sum and sum of squares of every exotic payoff, Numba version.
+
+        prange runs one block of PATH_BLOCK paths per iteration. Inside a
+        block the loop is time-major: step every path forward by dt, then
+        update its running sum / max / min.
+        """
+        dt = T / n_steps
+        drift = (r - 0.5 * sigma**2) * dt
+        vol = sigma * np.sqrt(dt)
+        n_blocks = len(seeds)
+        block_sums = np.zeros((n_blocks, 3))
+        block_sq_sums = np.zeros((n_blocks, 3))
+
+        for c in prange(n_blocks):
+            np.random.seed(seeds[c])
+            n = min(PATH_BLOCK, n_paths - c * PATH_BLOCK)
+            price = np.full(n, S)
+            total = np.zeros(n)
+            high = np.full(n, S)
+            low = np.full(n, S)
+
+            for _ in range(n_steps):
+                for p in range(n):
+                    price[p] *= np.exp(drift + vol * np.random.randn())
+                    total[p] += price[p]
+                    high[p] = max(high[p], price[p])
+                    low[p] = min(low[p], price[p])
+
+            for p in range(n):
+                asian = max(total[p] / n_steps - K, 0.0)
+                up_and_out = 0.0 if high[p] >= barrier else max(price[p] - K, 0.0)
+                lookback = price[p] - low[p]
+                block_sums[c, 0] += asian
+                block_sums[c, 1] += up_and_out
+                block_sums[c, 2] += lookback
+                block_sq_sums[c, 0] += asian * asian
+                block_sq_sums[c, 1] += up_and_out * up_and_out
+                block_sq_sums[c, 2] += lookback * lookback
+
+        return block_sums.sum(axis=0), block_sq_sums.sum(axis=0)
+
+
+def price_exotics(S, K, T, r, sigma, n_paths=1_000_000, n_steps=252,
+                  barrier=np.inf, seed=None):
+    """
+    Price all three exotic calls from one set of paths.
+
+    Returns {style: (price, standard error)} for asian, barrier (up-and-out
+    at `barrier`, monitored every step) and lookback (floating strike).
+    """
+    seed = resolve_seed(seed)
+    if NUMBA_AVAILABLE:
+        seeds = chunk_seeds(seed, n_paths, PATH_BLOCK)
+        sums, sq_sums = exotic_sums_numba(float(S), float(K), float(T), float(r),
+                                          float(sigma), n_paths, n_steps,
+                                          float(barrier), seeds)
+    else:
+        sums, sq_sums = exotic_sums_numpy(S, K, T, r, sigma, n_paths, n_steps,
+                                          barrier, seed)
+
+    discount = np.exp(-r * T)
+    mean = sums / n_paths
+    se = np.sqrt(np.maximum(sq_sums / n_paths - mean**2, 0.0) / (n_paths - 1))
+    return {style: (discount * mean[i], discount * se[i])
+            for i, style in enumerate(EXOTIC_STYLES)}
+
+
+def price_exotic(style, S, K, T, r, sigma, n_paths=1_000_000, n_steps=252,
+                 barrier=np.inf, seed=None):
+    """Price one exotic call: returns (price, standard error)"""
+    if style not in EXOTIC_STYLES:
+        raise ValueError(f"Unknown exotic style: {style!r} (use one of {EXOTIC_STYLES})")
+    if style == "barrier" and not np.isfinite(barrier):
+        raise ValueError("A barrier option needs a finite barrier level")
+    return price_exotics(S, K, T, r, sigma, n_paths, n_steps, barrier, seed)[style]
+
+
+def main():
+    S, K, T, r, sigma, barrier = 100, 100, 1.0, 0.05, 0.2, 130
+    n_paths, n_steps = 1_000_000, 252
+
+    print("\n" + "="*60)
+    print(" PATH-DEPENDENT OPTIONS")
+    print("="*60)
+    print(f"\n{n_paths:,} paths x {n_steps} daily steps "
+          f"(a full path matrix would be {n_paths * n_steps * 8 / 1e9:.1f} GB)")
+    print(f"Engine: {'Numba prange' if NUMBA_AVAILABLE else 'NumPy (install numba!)'}\n")
+
+    price_exotics(S, K, T, r, sigma, 1000, 2, barrier, seed=42)  # Warmup: start Numba's threads
+    start = time.time()
+    prices = price_exotics(S, K, T, r, sigma, n_paths, n_steps, barrier, seed=42)
+    elapsed = time.time() - start
+
+    labels = {
+        "asian": "Asian (average price) call",
+        "barrier": f"Up-and-out call, barrier ${barrier}",
+        "lookback": "Lookback (floating strike) call",
+    }
+    for style, (price, se) in prices.items():
+        print(f"  {labels[style]:<34} ${price:7.4f} +/- {se:.4f}")
+    print(f"\n  Time: {elapsed:.2f}s")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Risk Models - How simulated asset returns are correlated
+
+Real assets move together. A risk model turns independent normal draws
+into correlated asset returns:
+
+    asset_returns = mu + Z_factors @ loadings.T + Z_specific * specific
+
+    independent_model: no factors, specific = sigma (what the demos started with)
+    cholesky_model:    loadings = cholesky(cov), full correlation, O(n^2) per path
+    factor_model:      k factors + specific risk, O(n*k) per path
+
+For a book with 2,000 assets and 20 factors, the factor model is 100x less
+work per path than the full Cholesky factor.
+
+Usage:
+    from risk_models import cholesky_model, simulate_asset_returns
+    model = cholesky_model(mu, cov)
+    returns = simulate_asset_returns(model, 100_000, rng)  # (100_000, n_assets)
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+RiskModel = namedtuple("RiskModel", ["mu", "loadings", "specific"])
+RiskModel.__doc__ = """Asset returns = mu + Z_f @ loadings.T + Z_e * specific
+
+mu:       (n_assets,) expected returns
+loadings: (n_assets, n_factors) matrix, or None for no common factors
+specific: (n_assets,) idiosyncratic volatilities, or None for none
+"""
+
+
+def independent_model(mu, sigma):
+    """Uncorrelated assets with volatilities sigma"""
+    return RiskModel(np.asarray(mu, dtype=float), None, np.asarray(sigma, dtype=float))
+
+
+def cholesky_model(mu, cov):
+    """Full covariance matrix, factored once with Cholesky (cov = L @ L.T)"""
+    return RiskModel(np.asarray(mu, dtype=float), np.linalg.cholesky(cov), None)
+
+
+def factor_model(mu, loadings, specific):
+    """Low-rank model: cov = loadings @ loadings.T + diag(specific**2)"""
+    return RiskModel(np.asarray(mu, dtype=float), np.asarray(loadings, dtype=float),
+                     np.asarray(specific, dtype=float))
+
+
+def factor_model_from_cov(mu, cov, n_factors):
+    """
+    Approximate a covariance matrix with its top n_factors principal components.
+
+    The variance the factors don't explain becomes specific risk, so every
+    asset keeps its total volatility.
+    """
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    top = np.argsort(eigvals)[::-1][:n_factors]
+    loadings = eigvecs[:, top] * np.sqrt(np.maximum(eigvals[top], 0.0))
+    specific = np.sqrt(np.maximum(np.diag(cov) - (loadings**2).sum(axis=1), 0.0))
+    return factor_model(mu, loadings, specific)
+
+
+def constant_correlation_cov(sigma, rho):
+    """Covariance matrix where every pair of assets has correlation rho"""
+    sigma = np.asarray(sigma, dtype=float)
+    corr = np.full((len(sigma), len(sigma)), rho)
+    np.fill_diagonal(corr, 1.0)
+    return corr * np.outer(sigma, sigma)
+
+
+def model_cov(model):
+    """Covariance matrix implied by a risk model"""
+    n = len(model.mu)
+    cov = np.zeros((n, n))
+    if model.loadings is not None:
+        cov += model.loadings @ model.loadings.T
+    if model.specific is not None:
+        cov += np.diag(model.specific**2)
+    return cov
+
+
+def simulate_asset_returns(model, n_sims, rng):
+    """
+    Simulate an (n_sims x n_assets) block of correlated asset returns.
+
+    One batched matrix product per block; factor draws come first, then
+    specific draws, so the independent model uses the stream exactly like
+    rng.standard_normal((n_sims, n_assets)) * sigma + mu.
+    """
+    n_assets = len(model.mu)
+    returns = np.broadcast_to(model.mu, (n_sims, n_assets)).copy()
+    if model.loadings is not None:
+        Z = rng.standard_normal((n_sims, model.loadings.shape[1]))
+        returns += Z @ model.loadings.T
+    if model.specific is not None:
+        returns += rng.standard_normal((n_sims, n_assets)) * model.specific
+    return returns
@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Warm Worker Pool - Pay process startup once, not on every call
+
+Every `with ProcessPoolExecutor(...)` block starts fresh processes, and each
+one has to import NumPy (and Numba) again before doing any work. For small
+jobs that startup dominates. WarmPool keeps the same processes alive across
+calls and imports the heavy modules once, in the pool initializer.
+
+Usage:
+    from worker_pool import get_pool
+    var = calculate_var_parallel(100_000, 4, pool=get_pool(4))
+    pool = get_pool(4, affinity="spread")   # pin workers to cores (affinity.py)
+
+    python worker_pool.py    # benchmark: new pool per call vs warm pool
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+import atexit
+import importlib
+import multiprocessing
+from multiprocessing import resource_tracker
+import sys
+import time
+
+import numpy as np
+
+PRELOAD_MODULES = ("numpy", "numba")
+
+
+def mp_context():
+    """
+    multiprocessing context for new pools: plain fork, unless Numba's TBB
+    threading layer is already running in this process (after any
+    parallel=True kernel). Forking then can hang the parent at exit, so
+    the workers come from a fork server instead.
+
+    Also starts this process's resource tracker, so that workers inherit
+    it. A worker forked before it starts gets a tracker of its own, which
+    claims every shared_memory segment the worker attaches to and unlinks
+    them (with "leaked shared_memory" warnings) when the pool shuts down.
+    """
+    resource_tracker.ensure_running()
+    parallel = sys.modules.get("numba.np.ufunc.parallel")
+    tbb_running = (getattr(parallel, "_is_initialized", False)
+                   and getattr(parallel, "_threading_layer", None) == "tbb")
+    if tbb_running and "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+def _preload(module_names):
+    """Pool initializer: import the heavy modules once per worker"""
+    for name in module_names:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass  # Optional module (e.g. numba) not installed
+
+
+def _init_worker(module_names, counter=None, cpu_sets=None):
+    """Pool initializer: pin the worker (if asked), then preload modules"""
+    if cpu_sets is not None:
+        from affinity import pin_worker
+        pin_worker(counter, cpu_sets)
+    _preload(module_names)
+
+
+def pool_options(n_workers, affinity=None, preload=PRELOAD_MODULES):
+    """
+    ProcessPoolExecutor keyword arguments for n_workers workers.
+
+    affinity=None leaves placement to the OS; "spread", "compact" or
+    "node" pins worker k to affinity.placement(...)[k].
+    """
+    ctx = mp_context()
+    initargs = (tuple(preload),)
+    if affinity is not None:
+        from affinity import check_supported, placement
+        check_supported()
+        initargs += (ctx.Value("i", 0), placement(n_workers, affinity))
+    return dict(max_workers=n_workers, mp_context=ctx, initializer=_init_worker,
+                initargs=initargs)
+
+
+def _ping():
+    """Tiny task used to start the workers ahead of time"""
+    return True
+
+
+class WarmPool:
+    """
+    A long-lived process pool that can be reused across many calls.
+
+    Use it as a context manager for a block of work, or keep one around for
+    the whole program with get_pool().
+    """
+
+    def __init__(self, n_workers=None, preload=PRELOAD_MODULES, affinity=None):
+        self.n_workers = n_workers or multiprocessing.cpu_count()
+        self.affinity = affinity
+        self.executor = ProcessPoolExecutor(**pool_options(self.n_workers, affinity, preload))
+
+    def warm_up(self):
+        """Start all workers now, so the first real call doesn't pay for it"""
+        futures = [self.executor.submit(_ping) for _ in range(self.n_workers)]
+        for f in futures:
+            f.result()
+        return self
+
+    def submit(self, fn, *args, **kwargs):
+        return self.executor.submit(fn, *args, **kwargs)
+
+    def map(self, fn, *iterables):
+        return self.executor.map(fn, *iterables)
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+_POOL = None
+
+
+def get_pool(n_workers=None, affinity=None):
+    """
+    Return the module-level warm pool, creating it on first use.
+
+    Asking for a different number of workers or affinity policy replaces
+    the pool.
+    """
+    global _POOL
+    n_workers = n_workers or multiprocessing.cpu_count()
+    if _POOL is None or _POOL.n_workers != n_workers or _POOL.affinity != affinity:
+        shutdown_pool()
+        _POOL = WarmPool(n_workers, affinity=affinity).warm_up()
+    return _POOL
+
+
+@atexit.register
+def shutdown_pool():
+    """Shut down the module-level pool (also runs at interpreter exit)"""
+    global _POOL
+    if _POOL is not None:
+        _POOL.shutdown()
+        _POOL = None
+
+
+@contextmanager
+def borrow_executor(pool, n_workers):
+    """
+    Yield `pool` if given, otherwise a fresh ProcessPoolExecutor.
+
+    A borrowed pool stays open afterwards; a fresh one is shut down, which
+    is exactly the old `with ProcessPoolExecutor(...)` behaviour.
+    """
+    if pool is not None:
+        yield pool
+    else:
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=mp_context()) as executor:
+            yield executor
+
+
+# =============================================================================
+# Benchmark: per-call latency for small jobs
+# =============================================================================
+
+def benchmark(n_calls=20, n_sims=20_000, n_workers=None):
+    """Median per-call latency of a small VaR job, cold pools vs a warm pool"""
+    from finance_demo import calculate_var_parallel
+
+    n_workers = n_workers or min(4, multiprocessing.cpu_count())
+
+    def per_call(pool):
+        times = []
+        for _ in range(n_calls):
+            start = time.perf_counter()
+            calculate_var_parallel(n_sims, n_workers, engine="block", pool=pool)
+            times.append(time.perf_counter() - start)
+        return np.median(times)
+
+    cold = per_call(None)
+    with WarmPool(n_workers) as pool:
+        pool.warm_up()
+        warm = per_call(pool)
+    return cold, warm
+
+
+def main():
+    n_calls, n_sims = 20, 20_000
+    n_workers = min(4, multiprocessing.cpu_count())
+
+    print("\n" + "="*60)
+    print(" WARM POOL BENCHMARK")
+    print("="*60)
+    print(f"\n{n_calls} small VaR jobs ({n_sims:,} sims) on {n_workers} workers\n")
+
+    cold, warm = benchmark(n_calls, n_sims, n_workers)
+    print(f"  New pool per call: {cold * 1000:8.1f} ms per call")
+    print(f"  Warm pool:         {warm * 1000:8.1f} ms per call")
+    print(f"  Speedup:           {cold / warm:8.1f}x")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Core Pinning - Keep each worker on its own core (and its own memory)
+
+By default the OS scheduler moves worker processes between cores. On a
+machine with two sockets (two NUMA nodes), a worker can start on socket 0,
+allocate its arrays there, and later run on socket 1, where every memory
+access crosses the interconnect. Timings then vary from run to run.
+
+Pinning fixes each worker to a set of CPUs with os.sched_setaffinity
+(Linux only), following the topology in /sys/devices/system:
+
+    spread:   worker k on its own physical core, alternating NUMA nodes
+              (most memory bandwidth per worker)
+    compact:  fill the cores of node 0 first, then node 1, ...
+              (workers share caches, remote memory is avoided longest)
+    node:     worker k may use any CPU of node k % n_nodes
+              (memory stays local, the OS still balances within a node)
+
+Usage:
+    from worker_pool import get_pool
+    pool = get_pool(8, affinity="spread")
+
+    python affinity.py    # throughput and run-to-run spread, pinned vs not
+"""
+
+import glob
+import os
+import time
+
+SYS_ROOT = "/sys/devices/system"
+POLICIES = ("spread", "compact", "node")
+
+
+def parse_cpulist(text):
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in text.strip().split(","):
+        if not part:
+            continue
+        lo, _, hi = part.partition("-")
+        cpus.extend(range(int(lo), int(hi or lo) + 1))
+    return cpus
+
+
+def _read_int(path, default):
+    try:
+        with open(path) as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return default
+
+
+def read_topology(root=SYS_ROOT):
+    """
+    One dict per CPU this process may run on: cpu, package, core, node.
+
+    package is the socket, core the physical core (hyper-threads of one
+    core share it), node the NUMA node. Missing /sys entries (containers,
+    non-Linux) fall back to one socket, one node, one core per CPU.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        allowed = sorted(os.sched_getaffinity(0))
+    else:
+        allowed = list(range(os.cpu_count() or 1))
+
+    node_of = {}
+    for path in glob.glob(os.path.join(root, "node", "node[0-9]*", "cpulist")):
+        node = int(os.path.basename(os.path.dirname(path))[4:])
+        with open(path) as f:
+            for cpu in parse_cpulist(f.read()):
+                node_of[cpu] = node
+
+    topology = []
+    for cpu in allowed:
+        base = os.path.join(root, "cpu", f"cpu{cpu}", "topology")
+        topology.append({
+            "cpu": cpu,
+            "package": _read_int(os.path.join(base, "physical_package_id"), 0),
+            "core": _read_int(os.path.join(base, "core_id"), cpu),
+            "node": node_of.get(cpu, 0),
+        })
+    return topology
+
+
+def physical_cores(topology):
+    """{node: [cpus of core 0, cpus of core 1, ...]}, hyper-threads grouped together"""
+    cores = {}
+    for entry in topology:
+        cores.setdefault((entry["node"], entry["package"], entry["core"]), []).append(entry["cpu"])
+    by_node = {}
+    for (node, _, _), cpus in sorted(cores.items()):
+        by_node.setdefault(node, []).append(tuple(sorted(cpus)))
+    return by_node
+
+
+def placement(n_workers, policy="spread", topology=None):
+    """
+    The CPU set of every worker: a list of n_workers tuples of CPU ids.
+
+    With more workers than cores the assignment wraps around, so some
+    cores get two workers - better to size the pool to the cores.
+    """
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown affinity policy: {policy!r} (use one of {POLICIES})")
+    by_node = physical_cores(read_topology() if topology is None else topology)
+    nodes = sorted(by_node)
+
+    if policy == "node":
+        slots = [tuple(cpu for core in by_node[node] for cpu in core) for node in nodes]
+    elif policy == "compact":
+        slots = [core for node in nodes for core in by_node[node]]
+    else:  # spread: first core of every node, then the second of every node, ...
+        slots = []
+        for i in range(max(len(cores) for cores in by_node.values())):
+            slots += [by_node[node][i] for node in nodes if i < len(by_node[node])]
+    return [slots[k % len(slots)] for k in range(n_workers)]
+
+
+def pin_worker(counter, cpu_sets):
+    """
+    Pool initializer part: pin this worker to the next CPU set.
+
+    `counter` is a multiprocessing.Value shared by the pool's workers, so
+    each one takes a different slot even though they all get the same
+    initargs. A replaced worker takes the next slot (wrapping around).
+    """
+    with counter.get_lock():
+        k = counter.value
+        counter.value += 1
+    os.sched_setaffinity(0, cpu_sets[k % len(cpu_sets)])
+
+
+def check_supported():
+    if not hasattr(os, "sched_setaffinity"):
+        raise RuntimeError("Core pinning needs os.sched_setaffinity (Linux only)")
+
+
+def _current_cpus(_=None):
+    """Pool task: (pid, CPUs this worker may run on)"""
+    time.sleep(0.1)  # Long enough for every worker to get one of these
+    return os.getpid(), tuple(sorted(os.sched_getaffinity(0)))
+
+
+# =============================================================================
+# Benchmark: throughput and run-to-run spread, pinned vs not
+# =============================================================================
+
+def pinning_benchmark(kernels=("cpu_intensive_work", "var"), n_workers=None,
+                      policies=(None,) + POLICIES, repeat=10, seed=42):
+    """
+    Run scaling.run_kernel `repeat` times per kernel and affinity policy.
+
+    Each kernel gets n_workers times its scaling.WORK, one part per
+    worker. Returns {kernel: {policy: measure() dict}}; None is the
+    unpinned pool. The run-to-run spread is the relative IQR
+    (iqr / median).
+    """
+    import multiprocessing
+    from benchmarks import measure
+    from scaling import WORK, run_kernel
+    from worker_pool import get_pool
+
+    n_workers = n_workers or multiprocessing.cpu_count()
+    results = {}
+    for kernel in kernels:
+        results[kernel] = {}
+        n = WORK[kernel] * n_workers
+        for policy in policies:
+            pool = get_pool(n_workers, affinity=policy)
+            results[kernel][policy] = measure(
+                run_kernel, kernel, n, n_workers, pool, seed,
+                name=f"{kernel}/{policy or 'unpinned'}", repeat=repeat, n_paths=n,
+            )
+    return results
+
+
+def main():
+    import multiprocessing
+    from worker_pool import get_pool
+
+    n_workers = min(8, multiprocessing.cpu_count())
+    topology = read_topology()
+    by_node = physical_cores(topology)
+
+    print("\n" + "="*60)
+    print(" CORE PINNING AND NUMA PLACEMENT")
+    print("="*60)
+    print(f"\n{len(topology)} CPUs, {sum(len(c) for c in by_node.values())} physical cores, "
+          f"{len(by_node)} NUMA node(s)")
+    for node, cores in by_node.items():
+        print(f"  node {node}: cores {', '.join('+'.join(map(str, c)) for c in cores)}")
+
+    try:
+        check_supported()
+    except RuntimeError as e:
+        print(f"\n  {e}")
+        return
+
+    print(f"\n[Placement of {n_workers} workers]")
+    for policy in POLICIES:
+        print(f"  {policy:<8} {placement(n_workers, policy, topology)}")
+    pool = get_pool(n_workers, affinity="spread")
+    pinned = dict(pool.map(_current_cpus, range(2 * n_workers)))
+    print(f"  spread pool, as seen by the workers: {sorted(pinned.values())}")
+
+    print(f"\n[Throughput and run-to-run spread, {n_workers} workers, 10 runs each]")
+    results = pinning_benchmark(n_workers=n_workers)
+    print(f"  {'Kernel':<20} {'Affinity':<9} {'Median':>8} {'Paths/sec':>13} "
+          f"{'Spread':>7} {'vs unpinned':>12}")
+    for kernel, by_policy in results.items():
+        base = by_policy[None]
+        for policy, stats in by_policy.items():
+            spread = stats["iqr"] / stats["median"]
+            change = stats["paths_per_sec"] / base["paths_per_sec"] - 1
+            print(f"  {kernel:<20} {policy or 'none':<9} {stats['median']:>7.3f}s "
+                  f"{stats['paths_per_sec']:>13,.0f} {spread:>7.1%} {change:>+11.1%}")
+    print("\n  Spread = IQR / median over the runs: pinning should shrink it most")
+    print("  on multi-socket machines; on one socket expect small differences.")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
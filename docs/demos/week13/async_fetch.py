@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+"""
+Async Downloads - Thousands of requests in flight on one thread
+
+Exercise 1 sped up download_stock with ThreadPoolExecutor(max_workers=6):
+every request in flight needs its own OS thread (memory, start-up, context
+switches), so 10,000 tickers need 10,000 threads or a long queue.
+
+With asyncio, a request that waits for the network simply yields to the
+event loop; one thread keeps any number of them in flight. To make that
+robust enough for a real quote service:
+
+    asyncio.Semaphore   at most `concurrency` requests at once
+    timeout             give up on one attempt after `timeout` seconds
+    retries             try again after a jittered exponential backoff,
+                        so failed clients don't all retry in lock-step
+
+A local stub quote server (QuoteServer) answers GET /quote/<TICKER> after
+a delay and can fail a fraction of requests, to exercise the retries.
+Standard library only: asyncio streams on both sides, urllib for threads.
+
+Usage:
+    python async_fetch.py                           # benchmark vs threads
+    python async_fetch.py --mode server --fail-rate 0.05
+
+    from async_fetch import download_all
+    quotes = download_all(["AAPL", "MSFT"], concurrency=100)
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+import argparse
+import asyncio
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+
+LATENCY = 1.0        # Seconds per simulated download, like download_stock
+CONCURRENCY = 10_000  # Requests in flight at once (asyncio)
+MAX_THREADS = 1_000   # Thread-pool size cap for the comparison
+TIMEOUT = 5.0        # Seconds per attempt
+RETRIES = 3          # Extra attempts after a failure
+BACKOFF = 0.1        # First retry waits up to 0.1s, then 0.2s, 0.4s, ...
+MAX_BACKOFF = 2.0
+SERVER_BACKLOG = 4096  # Pending connections the stub server accepts
+SIZES = (10, 100, 1_000, 10_000)
+
+
+class QuoteError(Exception):
+    """The quote server answered with an HTTP error status"""
+
+    def __init__(self, status, ticker):
+        super().__init__(f"HTTP {status} for {ticker}")
+        self.status = status
+
+
+def make_tickers(n):
+    """n distinct fake tickers: T00000, T00001, ..."""
+    return [f"T{i:05d}" for i in range(n)]
+
+
+# =============================================================================
+# Simulated downloads (no network): the async twin of download_stock
+# =============================================================================
+
+def simulated_download(ticker, latency=LATENCY):
+    """Blocking: sleeps like download_stock, holding a thread the whole time"""
+    time.sleep(latency)
+    return f"{ticker}: ${random.uniform(100, 500):.2f}"
+
+
+async def simulated_download_async(ticker, latency=LATENCY):
+    """Same result, but the wait yields to the event loop"""
+    await asyncio.sleep(latency)
+    return f"{ticker}: ${random.uniform(100, 500):.2f}"
+
+
+# =============================================================================
+# Stub quote server
+# =============================================================================
+
+class QuoteServer:
+    """
+    Minimal HTTP/1.1 quote server on localhost.
+
+    GET /quote/<TICKER> answers {"ticker": ..., "price": ...} after
+    `latency` seconds; a `fail_rate` fraction of requests get a 503
+    instead. One connection per request (Connection: close).
+    """
+
+    def __init__(self, latency=LATENCY, fail_rate=0.0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self.host = host
+        self.port = port
+        self.n_requests = 0
+        self.n_failed = 0
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port,
+                                                  backlog=SERVER_BACKLOG)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+            path = request.split(b" ", 2)[1].decode()
+            self.n_requests += 1
+            await asyncio.sleep(self.latency)
+            if not path.startswith("/quote/"):
+                status, body = 404, {"error": "not found"}
+            elif random.random() < self.fail_rate:
+                self.n_failed += 1
+                status, body = 503, {"error": "try again"}
+            else:
+                ticker = path[len("/quote/"):]
+                status, body = 200, {"ticker": ticker, "price": round(random.uniform(100, 500), 2)}
+            payload = json.dumps(body).encode()
+            writer.write(f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+                         f"Content-Type: application/json\r\n"
+                         f"Content-Length: {len(payload)}\r\n"
+                         f"Connection: close\r\n\r\n".encode() + payload)
+            await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass  # Client went away (e.g. it timed out)
+        finally:
+            writer.close()
+
+
+@contextmanager
+def serve_in_thread(latency=LATENCY, fail_rate=0.0):
+    """Run a QuoteServer on its own event loop thread; yields the server"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    server = asyncio.run_coroutine_threadsafe(
+        QuoteServer(latency, fail_rate).start(), loop).result()
+    try:
+        yield server
+    finally:
+        asyncio.run_coroutine_threadsafe(server.stop(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+
+# =============================================================================
+# Clients
+# =============================================================================
+
+def _parse_response(raw, ticker):
+    head, _, body = raw.partition(b"\r\n\r\n")
+    status = int(head.split(b" ", 2)[1])
+    if status != 200:
+        raise QuoteError(status, ticker)
+    return json.loads(body)
+
+
+async def fetch_quote(ticker, host, port):
+    """One GET /quote/<ticker> over asyncio streams: {"ticker", "price"}"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(f"GET /quote/{ticker} HTTP/1.1\r\nHost: {host}\r\n"
+                     f"Connection: close\r\n\r\n".encode())
+        await writer.drain()
+        raw = await reader.read()
+    finally:
+        writer.close()
+    return _parse_response(raw, ticker)
+
+
+def fetch_quote_blocking(ticker, host, port, timeout=TIMEOUT):
+    """The same request with urllib, for the thread pool"""
+    try:
+        with urllib.request.urlopen(f"http://{host}:{port}/quote/{ticker}",
+                                    timeout=timeout) as response:
+            return json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        raise QuoteError(e.code, ticker) from None
+
+
+def backoff_delay(attempt, backoff=BACKOFF, max_backoff=MAX_BACKOFF):
+    """
+    Seconds to wait before retry number attempt + 1.
+
+    "Full jitter": uniform between 0 and the exponential cap, so clients
+    that failed together spread their retries out.
+    """
+    return random.uniform(0, min(max_backoff, backoff * 2 ** attempt))
+
+
+def _retryable(error):
+    if isinstance(error, QuoteError):
+        return error.status >= 500  # Server trouble: worth another try; 4xx is not
+    return isinstance(error, (asyncio.TimeoutError, OSError))
+
+
+async def fetch_all(tickers, fetch=simulated_download_async, concurrency=CONCURRENCY,
+                    timeout=TIMEOUT, retries=RETRIES, backoff=BACKOFF):
+    """
+    await fetch(ticker) for every ticker, at most `concurrency` at a time.
+
+    Each attempt is limited to `timeout` seconds; timeouts, connection
+    errors and 5xx answers are retried up to `retries` times after
+    backoff_delay. The semaphore is released while backing off. Returns
+    results in ticker order; a ticker that still failed gets its
+    exception instead of a result.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(ticker):
+        for attempt in range(retries + 1):
+            try:
+                async with semaphore:
+                    return await asyncio.wait_for(fetch(ticker), timeout)
+            except Exception as e:
+                if attempt == retries or not _retryable(e):
+                    raise
+            await asyncio.sleep(backoff_delay(attempt, backoff))
+
+    return await asyncio.gather(*(one(t) for t in tickers), return_exceptions=True)
+
+
+def download_all(tickers, fetch=simulated_download_async, concurrency=CONCURRENCY,
+                 timeout=TIMEOUT, retries=RETRIES):
+    """fetch_all from synchronous code"""
+    return asyncio.run(fetch_all(tickers, fetch, concurrency, timeout, retries))
+
+
+def download_all_threads(tickers, fetch=simulated_download, max_workers=MAX_THREADS,
+                         return_exceptions=False):
+    """
+    The Exercise 1 pattern: one blocking fetch per thread, no retries.
+
+    return_exceptions=True puts a failed ticker's exception in its place
+    (like fetch_all) instead of raising the first one.
+    """
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(tickers))) as pool:
+        futures = [pool.submit(fetch, ticker) for ticker in tickers]
+        if not return_exceptions:
+            return [f.result() for f in futures]
+        return [f.exception() or f.result() for f in futures]
+
+
+# =============================================================================
+# Benchmark: thread pool vs asyncio
+# =============================================================================
+
+def benchmark(sizes=SIZES, mode="simulated", latency=LATENCY, max_threads=MAX_THREADS,
+              concurrency=CONCURRENCY, fail_rate=0.0):
+    """
+    Wall time of download_all_threads vs download_all for each size.
+
+    mode="simulated" sleeps instead of using the network; mode="server"
+    sends real HTTP requests to a QuoteServer on localhost, the same one
+    (with the same fail_rate) for both clients. Returns one dict per size:
+    n, threads and asyncio seconds, and the tickers each client failed to
+    get (the thread pool doesn't retry, asyncio does).
+    """
+    rows = []
+    for n in sizes:
+        tickers = make_tickers(n)
+        if mode == "simulated":
+            start = time.perf_counter()
+            thread_results = download_all_threads(
+                tickers, partial(simulated_download, latency=latency), max_threads, True)
+            t_threads = time.perf_counter() - start
+
+            start = time.perf_counter()
+            results = download_all(tickers, partial(simulated_download_async, latency=latency),
+                                   concurrency)
+            t_async = time.perf_counter() - start
+        elif mode == "server":
+            # One server on its own thread, so it doesn't share the client's event loop
+            with serve_in_thread(latency, fail_rate) as server:
+                fetch = partial(fetch_quote_blocking, host=server.host, port=server.port)
+                start = time.perf_counter()
+                thread_results = download_all_threads(tickers, fetch, max_threads, True)
+                t_threads = time.perf_counter() - start
+
+                fetch = partial(fetch_quote, host=server.host, port=server.port)
+                start = time.perf_counter()
+                results = download_all(tickers, fetch, concurrency)
+                t_async = time.perf_counter() - start
+        else:
+            raise ValueError(f"Unknown mode: {mode!r} (use 'simulated' or 'server')")
+        rows.append({
+            "n": n,
+            "threads": t_threads,
+            "asyncio": t_async,
+            "threads_failed": sum(isinstance(r, BaseException) for r in thread_results),
+            "asyncio_failed": sum(isinstance(r, BaseException) for r in results),
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Thread pool vs asyncio downloads")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES),
+                        help="numbers of tickers to download")
+    parser.add_argument("--mode", choices=("simulated", "server"), default="simulated",
+                        help="sleep per download, or real HTTP to a local stub server")
+    parser.add_argument("--latency", type=float, default=LATENCY, help="seconds per download")
+    parser.add_argument("--threads", type=int, default=MAX_THREADS, help="thread-pool cap")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="asyncio requests in flight (default: 10,000; 1,000 for server)")
+    parser.add_argument("--fail-rate", type=float, default=0.0,
+                        help="server mode: fraction of requests answered with a 503")
+    args = parser.parse_args()
+    # Each open request costs a file descriptor on both ends in server mode
+    concurrency = args.concurrency or (CONCURRENCY if args.mode == "simulated" else 1_000)
+
+    print("\n" + "="*60)
+    print(" THREAD POOL vs ASYNCIO DOWNLOADS")
+    print("="*60)
+    print(f"\n{args.mode} downloads, {args.latency:.2f}s each; up to {args.threads:,} threads "
+          f"vs {concurrency:,} requests in flight on one thread\n")
+
+    rows = benchmark(args.sizes, args.mode, args.latency, args.threads, concurrency,
+                     args.fail_rate)
+    print(f"  {'Tickers':>8} {'Threads':>9} {'asyncio':>9} {'Speedup':>8} "
+          f"{'Lost (threads)':>15} {'Lost (asyncio)':>15}")
+    for row in rows:
+        print(f"  {row['n']:>8,} {row['threads']:>8.2f}s {row['asyncio']:>8.2f}s "
+              f"{row['threads'] / row['asyncio']:>7.1f}x {row['threads_failed']:>15,} "
+              f"{row['asyncio_failed']:>15,}")
+    print(f"\n  Threads need one OS thread per request in flight; past {args.threads:,}")
+    print("  requests they queue. asyncio keeps them all in flight on one thread.")
+    if args.fail_rate:
+        print(f"  {args.fail_rate:.0%} of server answers were 503s, for both clients: the thread")
+        print("  pool lost those tickers, asyncio retried them (and spent the time doing so).")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
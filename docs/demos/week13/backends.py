@@ -0,0 +1,335 @@
+#!/usr/bin/env python3
+"""
+Backend Dispatch - Let the machine pick the fastest implementation
+
+Every kernel this week exists in several versions: pure Python, NumPy,
+Numba, Numba parallel and a process pool. Which one is fastest depends on
+the problem size (a process pool costs milliseconds to hand out work, Numba
+parallel has thread start-up cost) and on the machine.
+
+So we measure instead of guessing. A one-time calibration times every
+backend at three sizes (one tiny, so the overhead is measured, not
+extrapolated) and fits
+
+    time(n) = overhead + n * cost_per_path
+
+The fits are cached on disk; afterwards estimate_pi / price_option / var
+pick the backend with the lowest predicted time. Without Numba, the Numba
+backends simply aren't candidates.
+
+Usage:
+    python backends.py            # calibrate (first run only) and show choices
+
+    from backends import estimate_pi, price_option, var
+    price_option(100, 105, 1.0, 0.05, 0.2, 5_000_000, seed=42)
+    var(1_000_000, backend="numba")  # or force a backend
+"""
+
+import json
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+from benchmarks import environment, measure
+from convergence import option_payoff_sums
+from finance_demo import MU, SIGMA, WEIGHTS, calculate_var_parallel, calculate_var_sequential
+from numba_demo import NUMBA_AVAILABLE, option_price_python, var_python
+from rng_streams import CHUNK_SIZE, chunk_rng, chunk_seeds, partition_chunks, resolve_seed
+from worker_pool import get_pool
+
+if NUMBA_AVAILABLE:
+    from numba import njit, prange
+    from numba_demo import option_price_numba, var_numba, var_parallel
+
+BACKENDS = ("python", "numpy", "numba", "numba-parallel", "process")
+KERNELS = ("estimate_pi", "price_option", "var")
+CALIBRATION_FILE = os.environ.get(
+    "WEEK13_CALIBRATION",
+    os.path.join(os.path.expanduser("~"), ".cache", "week13_backends.json"),
+)
+CALIBRATION_SIZES = (100, 20_000, 200_000)  # Pure Python is not timed at the last
+CALIBRATION_OPTION = (100.0, 105.0, 1.0, 0.05, 0.2)  # S, K, T, r, sigma
+
+
+def available_backends():
+    """Backends that can run here (the Numba ones need numba installed)"""
+    if NUMBA_AVAILABLE:
+        return BACKENDS
+    return tuple(b for b in BACKENDS if not b.startswith("numba"))
+
+
+def _n_workers():
+    return multiprocessing.cpu_count()
+
+
+# =============================================================================
+# Monte Carlo pi on every backend
+# =============================================================================
+
+def pi_hits_python(n, seed, first_chunk=0):
+    """Points inside the unit quarter circle, one draw at a time"""
+    inside = 0
+    for i in range(n):
+        if i % CHUNK_SIZE == 0:
+            rng = chunk_rng(seed, first_chunk + i // CHUNK_SIZE)
+        x = rng.random()
+        y = rng.random()
+        if x*x + y*y < 1:
+            inside += 1
+    return inside
+
+
+def pi_hits_numpy(n, seed, first_chunk=0):
+    """Same count, one chunk of points at a time"""
+    inside = 0
+    for j, start in enumerate(range(0, n, CHUNK_SIZE)):
+        xy = chunk_rng(seed, first_chunk + j).random((min(CHUNK_SIZE, n - start), 2))
+        inside += int(np.count_nonzero((xy * xy).sum(axis=1) < 1))
+    return inside
+
+
+if NUMBA_AVAILABLE:
+    @njit("int64(int64, uint32[::1])", cache=True)
+    def pi_hits_numba(n, seeds):
+        inside = 0
+        for i in range(n):
+            if i % CHUNK_SIZE == 0:
+                np.random.seed(seeds[i // CHUNK_SIZE])
+            x = np.random.random()
+            y = np.random.random()
+            if x*x + y*y < 1:
+                inside += 1
+        return inside
+
+    @njit("int64(int64, uint32[::1])", parallel=True, cache=True)
+    def pi_hits_parallel(n, seeds):
+        inside = 0
+        for c in prange(len(seeds)):
+            np.random.seed(seeds[c])
+            for _ in range(c * CHUNK_SIZE, min((c + 1) * CHUNK_SIZE, n)):
+                x = np.random.random()
+                y = np.random.random()
+                if x*x + y*y < 1:
+                    inside += 1
+        return inside
+
+    @njit("float64(float64, float64, float64, float64, float64, int64, uint32[::1])",
+          parallel=True, cache=True)
+    def option_price_parallel(S, K, T, r, sigma, n_sims, seeds):
+        """option_price_numba with one prange iteration per chunk"""
+        drift = (r - 0.5*sigma**2)*T
+        vol = sigma*np.sqrt(T)
+        total_payoff = 0.0
+        for c in prange(len(seeds)):
+            np.random.seed(seeds[c])
+            for _ in range(c * CHUNK_SIZE, min((c + 1) * CHUNK_SIZE, n_sims)):
+                total_payoff += max(S * np.exp(drift + vol*np.random.randn()) - K, 0.0)
+        return np.exp(-r * T) * total_payoff / n_sims
+
+
+def _process_sum(fn, n, seed, *args):
+    """Run fn(n_paths, *args, seed, first_chunk) over whole chunks on the pool"""
+    n_workers = _n_workers()
+    pool = get_pool(n_workers)
+    futures = [pool.submit(fn, n_paths, *args, seed, first)
+               for first, n_paths in partition_chunks(n, n_workers)]
+    return sum(f.result() for f in futures)
+
+
+# =============================================================================
+# One entry per (kernel, backend)
+# =============================================================================
+
+def _estimate_pi(backend, n, seed):
+    if backend == "python":
+        inside = pi_hits_python(n, seed)
+    elif backend == "numpy":
+        inside = pi_hits_numpy(n, seed)
+    elif backend == "numba":
+        inside = pi_hits_numba(n, chunk_seeds(seed, n))
+    elif backend == "numba-parallel":
+        inside = pi_hits_parallel(n, chunk_seeds(seed, n))
+    else:
+        inside = _process_sum(pi_hits_numpy, n, seed)
+    return 4 * inside / n
+
+
+def _price_option(backend, n, seed, S, K, T, r, sigma):
+    if backend == "python":
+        return option_price_python(S, K, T, r, sigma, n, seed)
+    if backend == "numba":
+        return option_price_numba(S, K, T, r, sigma, n, chunk_seeds(seed, n))
+    if backend == "numba-parallel":
+        return option_price_parallel(S, K, T, r, sigma, n, chunk_seeds(seed, n))
+    if backend == "numpy":
+        sums = option_payoff_sums(n, S, K, T, r, sigma, CHUNK_SIZE, seed)
+    else:
+        sums = _process_sum(option_payoff_sums, n, seed, S, K, T, r, sigma, CHUNK_SIZE)
+    return np.exp(-r * T) * sums[0] / n
+
+
+def _var(backend, n, seed):
+    if backend == "python":
+        return var_python(n, WEIGHTS, MU, SIGMA, seed)
+    if backend == "numpy":
+        return calculate_var_sequential(n, "block", method="tail", seed=seed)
+    if backend == "numba":
+        return var_numba(n, WEIGHTS, MU, SIGMA, chunk_seeds(seed, n))
+    if backend == "numba-parallel":
+        return var_parallel(n, WEIGHTS, MU, SIGMA, chunk_seeds(seed, n))
+    n_workers = _n_workers()
+    return calculate_var_parallel(n, n_workers, "block", method="tail", seed=seed,
+                                  pool=get_pool(n_workers))
+
+
+def run(kernel, n, backend=None, seed=None, **params):
+    """
+    Run a kernel on a backend (backend=None: the fastest one for this n).
+
+    All backends of a kernel estimate the same quantity from the same
+    seed's chunk streams; the Numba ones use Numba's generator, so their
+    answers differ by Monte Carlo noise.
+    """
+    if kernel not in KERNELS:
+        raise ValueError(f"Unknown kernel: {kernel!r} (use one of {KERNELS})")
+    if backend is None:
+        backend = choose_backend(kernel, n)
+    elif backend not in available_backends():
+        raise ValueError(f"Backend {backend!r} is not available here "
+                         f"(use one of {available_backends()})")
+    seed = resolve_seed(seed)
+    if kernel == "estimate_pi":
+        return _estimate_pi(backend, n, seed)
+    if kernel == "price_option":
+        return _price_option(backend, n, seed, float(params["S"]), float(params["K"]),
+                             float(params["T"]), float(params["r"]), float(params["sigma"]))
+    return _var(backend, n, seed)
+
+
+def estimate_pi(n, seed=None, backend=None):
+    """Monte Carlo estimate of pi from n random points"""
+    return run("estimate_pi", n, backend, seed)
+
+
+def price_option(S, K, T, r, sigma, n_sims, seed=None, backend=None):
+    """Monte Carlo price of a European call"""
+    return run("price_option", n_sims, backend, seed, S=S, K=K, T=T, r=r, sigma=sigma)
+
+
+def var(n_sims, seed=None, backend=None):
+    """95% VaR of finance_demo's portfolio"""
+    return run("var", n_sims, backend, seed)
+
+
+# =============================================================================
+# Calibration
+# =============================================================================
+
+_CALIBRATION = None
+
+
+def calibrate(path=CALIBRATION_FILE, force=False):
+    """
+    Fit time(n) = overhead + n * cost_per_path for every kernel and backend.
+
+    Loaded from `path` if it was made on this machine with the same
+    library versions, otherwise measured (tens of seconds) and saved.
+    Returns {kernel: {backend: (overhead s, cost per path s)}}.
+    """
+    global _CALIBRATION
+    if not force and _CALIBRATION is not None:
+        return _CALIBRATION
+    env = {k: v for k, v in environment(commit=False).items() if k not in ("commit", "timestamp")}
+    env["calibration_sizes"] = list(CALIBRATION_SIZES)
+    if not force and os.path.exists(path):
+        with open(path) as f:
+            saved = json.load(f)
+        if saved.get("environment") == env:
+            _CALIBRATION = {kernel: {b: tuple(fit) for b, fit in fits.items()}
+                            for kernel, fits in saved["kernels"].items()}
+            return _CALIBRATION
+
+    S, K, T, r, sigma = CALIBRATION_OPTION
+    table = {}
+    for kernel in KERNELS:
+        params = dict(S=S, K=K, T=T, r=r, sigma=sigma) if kernel == "price_option" else {}
+        table[kernel] = {}
+        for backend in available_backends():
+            sizes = CALIBRATION_SIZES[:-1] if backend == "python" else CALIBRATION_SIZES
+            times = [measure(run, kernel, n, backend, 0, repeat=3, **params)["median"]
+                     for n in sizes]
+            table[kernel][backend] = fit_time_model(sizes, times)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump({"environment": env, "kernels": table}, f, indent=2)
+    _CALIBRATION = table
+    return table
+
+
+def fit_time_model(sizes, times):
+    """
+    (overhead, cost per path) of time(n) = overhead + n * cost_per_path.
+
+    Least squares on the relative errors, so the tiny size pins down the
+    overhead instead of being swamped by the large ones. A negative
+    overhead is noise, not a free lunch: the tiny run, which is nearly all
+    overhead, is then taken as the overhead directly.
+    """
+    n = np.asarray(sizes, dtype=float)
+    t = np.asarray(times, dtype=float)
+    A = np.column_stack([np.ones_like(n), n]) / t[:, None]
+    overhead, cost = np.linalg.lstsq(A, np.ones_like(t), rcond=None)[0]
+    cost = max(cost, 0.0)
+    if overhead < 0:
+        overhead = max(t[0] - cost * n[0], 0.0)
+    return float(overhead), float(cost)
+
+
+def predicted_time(kernel, backend, n, table=None):
+    """Calibrated estimate of one run's seconds (table: a calibrate() result)"""
+    overhead, cost = (table or calibrate())[kernel][backend]
+    return overhead + cost * n
+
+
+def choose_backend(kernel, n):
+    """The available backend with the lowest predicted time for n paths"""
+    table = calibrate()
+    candidates = [b for b in available_backends() if b in table[kernel]]
+    return min(candidates, key=lambda b: predicted_time(kernel, b, n, table))
+
+
+def main():
+    print("\n" + "="*60)
+    print(" AUTOMATIC BACKEND SELECTION")
+    print("="*60)
+    print(f"\nBackends available: {', '.join(available_backends())}")
+
+    start = time.time()
+    table = calibrate()
+    print(f"Calibration ({CALIBRATION_FILE}): {time.time() - start:.1f}s\n")
+
+    sizes = (1_000, 100_000, 10_000_000, 1_000_000_000)
+    print(f"  {'Kernel':<13}" + "".join(f"{n:>16,}" for n in sizes))
+    for kernel in KERNELS:
+        print(f"  {kernel:<13}" + "".join(f"{choose_backend(kernel, n):>16}" for n in sizes))
+
+    print(f"\n  {'Kernel':<13} {'Backend':<15} {'Overhead':>10} {'Paths/sec':>14}")
+    for kernel, fits in table.items():
+        for backend, (overhead, cost) in fits.items():
+            rate = 1 / cost if cost > 0 else float("inf")
+            print(f"  {kernel:<13} {backend:<15} {overhead * 1000:>8.1f}ms {rate:>14,.0f}")
+
+    n = 5_000_000
+    start = time.perf_counter()
+    price = price_option(100, 105, 1.0, 0.05, 0.2, n, seed=42)
+    elapsed = time.perf_counter() - start
+    print(f"\n  price_option({n:,} paths) -> {choose_backend('price_option', n)}: "
+          f"${price:.4f} in {elapsed:.2f}s")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
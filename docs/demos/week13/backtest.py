@@ -0,0 +1,316 @@
+#!/usr/bin/env python3
+"""
+VaR Backtesting - Would the model have worked in the past?
+
+A 99% VaR should be broken on about 1% of days. To check, roll the model
+through history: for every date, fit it on the previous WINDOW days,
+forecast VaR, and record an "exception" when the realized return is worse.
+
+    Kupiec test:         is the exception RATE right? (1% of days)
+    Christoffersen test: are exceptions INDEPENDENT, or do they cluster?
+
+Every window is a separate Monte Carlo VaR, so a 10-year backtest is
+thousands of simulations - an embarrassingly parallel job:
+
+    backend="numpy":   one window after another
+    backend="numba":   prange over windows, all cores
+    backend="process": contiguous ranges of windows on a process pool
+
+Usage:
+    python backtest.py
+"""
+
+import math
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from historical_var import (CHUNK_DAYS, WINDOW, fit_garch, load_returns, make_demo_history,
+                            portfolio_returns, rolling_fhs_var_es, rolling_var_es)
+from rng_streams import chunk_rng, chunk_seeds, resolve_seed
+from worker_pool import borrow_executor
+
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+LEVEL = 0.99      # Basel backtests use 99% one-day VaR
+N_SIMS = 2_000    # Monte Carlo scenarios per window
+BACKENDS = ("numpy", "numba", "process")
+MODELS = ("mc", "historical", "fhs")
+# Compiled at import and cached on disk, like the kernels in numba_demo.py
+MC_VAR_WINDOWS_SIG = ("float64[::1](float64[:, ::1], float64[:, ::1], float64[::1], int64, "
+                      "float64, uint32[::1])")
+
+
+# =============================================================================
+# Rolling model parameters
+# =============================================================================
+
+def rolling_moments(history, window=WINDOW, chunk_days=CHUNK_DAYS):
+    """
+    Per-asset mean and volatility over every trailing window.
+
+    Running sums are built one chunk of the (memory-mapped) history at a
+    time, so each window costs O(n_assets) instead of O(window * n_assets).
+    Row i is the estimate for day window + i, made with days [i, i + window).
+    """
+    n_days, n_assets = history.shape
+    sums = np.zeros((n_days + 1, n_assets))
+    sq_sums = np.zeros((n_days + 1, n_assets))
+    for start in range(0, n_days, chunk_days):
+        stop = min(start + chunk_days, n_days)
+        x = np.asarray(history[start:stop])
+        sums[start + 1:stop + 1] = sums[start] + np.cumsum(x, axis=0)
+        sq_sums[start + 1:stop + 1] = sq_sums[start] + np.cumsum(x * x, axis=0)
+
+    # Drop the last row: it would forecast the day after the history ends
+    total = sums[window:-1] - sums[:-window - 1]
+    total_sq = sq_sums[window:-1] - sq_sums[:-window - 1]
+    mu = total / window
+    var = (total_sq - window * mu**2) / (window - 1)
+    return mu, np.sqrt(np.maximum(var, 0.0))
+
+
+# =============================================================================
+# Monte Carlo VaR for many windows
+# =============================================================================
+
+def mc_var_windows(mu, sigma, weights, n_sims=N_SIMS, level=LEVEL, seed=None,
+                   first_window=0):
+    """
+    Monte Carlo VaR (var_python's model) for each row of mu / sigma.
+
+    Window w draws from stream first_window + w, so splitting the windows
+    across workers doesn't change any forecast.
+    """
+    seed = resolve_seed(seed)
+    k = int(n_sims * (1 - level))
+    var = np.empty(len(mu))
+    for w in range(len(mu)):
+        rng = chunk_rng(seed, first_window + w)
+        returns = (rng.standard_normal((n_sims, len(weights))) * sigma[w] + mu[w]) @ weights
+        var[w] = np.partition(returns, k)[k]
+    return var
+
+
+if NUMBA_AVAILABLE:
+    @njit(MC_VAR_WINDOWS_SIG, parallel=True, cache=True)
+    def mc_var_windows_numba(mu, sigma, weights, n_sims, level, seeds):
+        """Same model with one prange iteration (and random stream) per window"""
+        n_windows, n_assets = mu.shape
+        k = int(n_sims * (1 - level))
+        var = np.empty(n_windows)
+        for w in prange(n_windows):
+            np.random.seed(seeds[w])
+            returns = np.empty(n_sims)
+            for i in range(n_sims):
+                total = 0.0
+                for j in range(n_assets):
+                    total += weights[j] * (mu[w, j] + sigma[w, j] * np.random.randn())
+                returns[i] = total
+            returns.sort()
+            var[w] = returns[k]
+        return var
+
+
+def rolling_mc_var(mu, sigma, weights, n_sims=N_SIMS, level=LEVEL, seed=None,
+                   backend="numpy", n_workers=None, pool=None):
+    """
+    Monte Carlo VaR forecast for every window (rows of rolling_moments).
+
+    numpy and process give identical forecasts; numba uses its own
+    generator, so its forecasts differ by Monte Carlo noise only.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend!r} (use one of {BACKENDS})")
+    seed = resolve_seed(seed)
+    weights = np.asarray(weights, dtype=float)
+
+    if backend == "numpy":
+        return mc_var_windows(mu, sigma, weights, n_sims, level, seed)
+
+    if backend == "numba":
+        if not NUMBA_AVAILABLE:
+            raise RuntimeError("backend='numba' needs numba: pip install numba")
+        seeds = chunk_seeds(seed, len(mu), 1)
+        return mc_var_windows_numba(np.ascontiguousarray(mu), np.ascontiguousarray(sigma),
+                                    np.ascontiguousarray(weights), n_sims, level, seeds)
+
+    n_workers = n_workers or multiprocessing.cpu_count()
+    # A few ranges per worker so a slow one doesn't hold up the others
+    bounds = np.linspace(0, len(mu), 4 * n_workers + 1).astype(int)
+    with borrow_executor(pool, n_workers) as executor:
+        futures = [
+            executor.submit(mc_var_windows, mu[a:b], sigma[a:b], weights, n_sims,
+                            level, seed, a)
+            for a, b in zip(bounds[:-1], bounds[1:]) if b > a
+        ]
+        return np.concatenate([f.result() for f in futures])
+
+
+# =============================================================================
+# Exception counting and coverage tests
+# =============================================================================
+
+def _xlogy(x, y):
+    """x * log(y), with 0 * log(0) = 0"""
+    return x * math.log(y) if x > 0 else 0.0
+
+
+def _chi2_sf(stat, df):
+    """P(chi2 > stat) for 1 or 2 degrees of freedom (no scipy needed)"""
+    if df == 1:
+        return math.erfc(math.sqrt(max(stat, 0.0) / 2))
+    return math.exp(-max(stat, 0.0) / 2)
+
+
+def kupiec_test(n_exceptions, n_days, level=LEVEL):
+    """
+    Kupiec proportion-of-failures test: (LR statistic, p-value).
+
+    Compares the likelihood of the observed exception rate with the rate
+    1 - level the model promises. A small p-value rejects the model.
+    """
+    p = 1 - level
+    x, n = n_exceptions, n_days
+    lr = -2 * (_xlogy(n - x, 1 - p) + _xlogy(x, p)
+               - _xlogy(n - x, 1 - x / n) - _xlogy(x, x / n))
+    return lr, _chi2_sf(lr, 1)
+
+
+def christoffersen_test(exceptions):
+    """
+    Christoffersen independence test: (LR statistic, p-value).
+
+    Is an exception more likely right after another one? A good model's
+    exceptions are spread out; clustered exceptions mean it reacts too
+    slowly to volatility.
+    """
+    hits = np.asarray(exceptions, dtype=int)
+    prev, curr = hits[:-1], hits[1:]
+    n00 = int(np.sum((prev == 0) & (curr == 0)))
+    n01 = int(np.sum((prev == 0) & (curr == 1)))
+    n10 = int(np.sum((prev == 1) & (curr == 0)))
+    n11 = int(np.sum((prev == 1) & (curr == 1)))
+
+    pi = (n01 + n11) / max(n00 + n01 + n10 + n11, 1)
+    pi01 = n01 / max(n00 + n01, 1)
+    pi11 = n11 / max(n10 + n11, 1)
+    ll_same = _xlogy(n00 + n10, 1 - pi) + _xlogy(n01 + n11, pi)
+    ll_markov = (_xlogy(n00, 1 - pi01) + _xlogy(n01, pi01)
+                 + _xlogy(n10, 1 - pi11) + _xlogy(n11, pi11))
+    lr = -2 * (ll_same - ll_markov)
+    return lr, _chi2_sf(lr, 1)
+
+
+def evaluate(realized, var, level=LEVEL):
+    """
+    Score VaR forecasts against realized returns (NaN forecasts are skipped).
+
+    Returns a dict with the exception count and rate plus the Kupiec,
+    Christoffersen and conditional coverage (both together) p-values.
+    """
+    realized = np.asarray(realized, dtype=float)
+    var = np.asarray(var, dtype=float)
+    valid = ~np.isnan(var)
+    exceptions = realized[valid] < var[valid]
+    n_days = int(valid.sum())
+    n_exceptions = int(exceptions.sum())
+    lr_pof, p_pof = kupiec_test(n_exceptions, n_days, level)
+    lr_ind, p_ind = christoffersen_test(exceptions)
+    return {
+        "days": n_days,
+        "exceptions": n_exceptions,
+        "expected": n_days * (1 - level),
+        "rate": n_exceptions / n_days,
+        "kupiec_p": p_pof,
+        "christoffersen_p": p_ind,
+        "conditional_p": _chi2_sf(lr_pof + lr_ind, 2),
+    }
+
+
+# =============================================================================
+# Full backtest
+# =============================================================================
+
+def backtest(history, weights, model="mc", window=WINDOW, level=LEVEL, n_sims=N_SIMS,
+             seed=None, backend="numpy", n_workers=None, pool=None):
+    """
+    Roll a VaR model through a return history and score it.
+
+    history is an (n_days x n_assets) array or memmap (historical_var.
+    load_returns). model is "mc" (Monte Carlo on rolling mean/volatility),
+    "historical" or "fhs" (filtered historical simulation). Returns the
+    evaluate() dict plus "seconds" and "windows_per_sec".
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model: {model!r} (use one of {MODELS})")
+    weights = np.asarray(weights, dtype=float)
+
+    start = time.perf_counter()
+    pnl = portfolio_returns(history, weights)
+    if model == "mc":
+        mu, sigma = rolling_moments(history, window)
+        var = np.full(len(pnl), np.nan)
+        var[window:] = rolling_mc_var(mu, sigma, weights, n_sims, level, seed,
+                                      backend, n_workers, pool)
+    elif model == "historical":
+        var, _ = rolling_var_es(pnl, window, level)
+    else:
+        # GARCH sees only the days before the first forecast: no look-ahead
+        params = fit_garch(pnl[:window])
+        var, _ = rolling_fhs_var_es(pnl, window, level, params)
+    elapsed = time.perf_counter() - start
+
+    result = evaluate(pnl, var, level)
+    result["seconds"] = elapsed
+    result["windows_per_sec"] = result["days"] / elapsed
+    return result
+
+
+def main():
+    n_days, n_assets = 2_500, 20  # About 10 years of daily returns
+    n_workers = multiprocessing.cpu_count()
+
+    print("\n" + "="*60)
+    print(" VaR BACKTESTING")
+    print("="*60)
+    print(f"\n{n_days:,} days x {n_assets} assets, {WINDOW}-day windows, "
+          f"{LEVEL:.0%} VaR, {N_SIMS:,} scenarios per window\n")
+
+    runs = [("mc", "numpy"), ("mc", "process")]
+    if NUMBA_AVAILABLE:
+        runs.append(("mc", "numba"))
+    runs += [("historical", "numpy"), ("fhs", "numpy")]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = make_demo_history(os.path.join(tmp, "returns.npy"), n_days, n_assets, seed=42)
+        history = load_returns(path)
+        weights = np.full(n_assets, 1 / n_assets)
+        if NUMBA_AVAILABLE:
+            backtest(history[:WINDOW + 2], weights, backend="numba")  # Start Numba's threads first
+
+        print(f"  {'Model':<12} {'Backend':<8} {'Exc.':>5} {'Exp.':>5} {'Kupiec p':>9} "
+              f"{'Christ. p':>9} {'Windows/s':>10}")
+        for model, backend in runs:
+            r = backtest(history, weights, model, seed=42, backend=backend,
+                         n_workers=n_workers)
+            print(f"  {model:<12} {backend:<8} {r['exceptions']:>5} {r['expected']:>5.0f} "
+                  f"{r['kupiec_p']:>9.3f} {r['christoffersen_p']:>9.3f} "
+                  f"{r['windows_per_sec']:>10,.0f}")
+        del history  # Close the memmap before the directory is removed
+
+    print("\n  p < 0.05: reject the model. The mc model is var_python's: independent")
+    print("  assets, constant volatility. The history has a common market factor")
+    print("  and volatility clustering, so it is rejected; filtered HS captures both.")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Early-Stopping Monte Carlo - Simulate until the answer is precise enough
+
+Instead of a fixed n_sims, ask for a precision:
+    "price this option to +/- 1 cent at 95% confidence"
+The engine runs batches (in parallel if you like), checks the confidence
+interval after each round, and stops as soon as the target is met. It also
+guesses how many more paths it needs, so it rarely takes more than 2 rounds.
+
+Usage:
+    python convergence.py
+
+    from convergence import price_option_to_precision
+    result = price_option_to_precision(150, 155, 0.25, 0.05, 0.30, target_halfwidth=0.01)
+    result["price"], result["halfwidth"], result["n_sims"]
+"""
+
+from contextlib import nullcontext
+from functools import partial
+from statistics import NormalDist
+import math
+import time
+
+import numpy as np
+
+from finance_demo import BLOCK_SIZE, sketch_order_stat, summarize_returns
+from rng_streams import chunk_rng, n_chunks, partition_chunks, resolve_seed
+from worker_pool import borrow_executor
+
+INITIAL_SIMS = 200_000     # First round; also the smallest round we run
+MAX_SIMS = 500_000_000     # Hard stop, even if the target isn't reached
+
+
+# =============================================================================
+# Batch tasks: each returns a summary that can simply be added up
+# =============================================================================
+
+def option_payoff_sums(n_sims, S, K, T, r, sigma, block_size=BLOCK_SIZE,
+                       seed=None, first_block=0):
+    """Sum and sum of squares of European call payoffs (vectorized, per block)"""
+    sums = np.zeros(2)
+    drift = (r - 0.5 * sigma**2) * T
+    vol = sigma * np.sqrt(T)
+    for j, start in enumerate(range(0, n_sims, block_size)):
+        n = min(block_size, n_sims - start)
+        Z = chunk_rng(seed, first_block + j).standard_normal(n)
+        payoff = np.maximum(S * np.exp(drift + vol * Z) - K, 0.0)
+        sums += payoff.sum(), (payoff * payoff).sum()
+    return sums
+
+
+# =============================================================================
+# The driver
+# =============================================================================
+
+def simulate_until(task, measure, target, n_workers=1, pool=None,
+                   block_size=BLOCK_SIZE, initial_sims=INITIAL_SIMS,
+                   max_sims=MAX_SIMS):
+    """
+    Run task(n_sims=..., first_block=...) in rounds until measure says stop.
+
+    task:    returns an additive summary (NumPy array) for a run of blocks
+    measure: (total_summary, n_sims) -> (estimate, CI half-width)
+    target:  the CI half-width to reach
+
+    Every round starts at a fresh block, so no random stream is reused.
+    """
+    total = None
+    n_done = 0
+    next_block = 0
+    n_round = initial_sims
+    use_pool = pool is not None or n_workers > 1
+
+    with borrow_executor(pool, n_workers) if use_pool else nullcontext() as executor:
+        while True:
+            # Whole blocks only, so each round starts on an unused stream
+            n_round = n_chunks(n_round, block_size) * block_size
+            parts = partition_chunks(n_round, n_workers, block_size)
+            if executor is None:
+                summaries = [task(n_sims=n, first_block=next_block + first)
+                             for first, n in parts]
+            else:
+                futures = [executor.submit(task, n_sims=n, first_block=next_block + first)
+                           for first, n in parts]
+                summaries = [f.result() for f in futures]
+
+            round_total = np.sum(summaries, axis=0)
+            total = round_total if total is None else total + round_total
+            n_done += n_round
+            next_block += n_chunks(n_round, block_size)
+
+            estimate, halfwidth = measure(total, n_done)
+            if halfwidth <= target or n_done >= max_sims:
+                break
+
+            # Half-width shrinks like 1/sqrt(n): estimate the paths still
+            # needed, plus 10% so we usually finish on the next round
+            n_needed = n_done * (halfwidth / target) ** 2 * 1.1
+            n_round = int(min(max(n_needed - n_done, initial_sims), max_sims - n_done))
+
+    return {
+        "estimate": estimate,
+        "halfwidth": halfwidth,
+        "n_sims": n_done,
+        "converged": halfwidth <= target,
+    }
+
+
+def _target_halfwidth(target_se, target_halfwidth, z):
+    """Accept either a standard error or a CI half-width as the target"""
+    if (target_se is None) == (target_halfwidth is None):
+        raise ValueError("Give exactly one of target_se or target_halfwidth")
+    return target_halfwidth if target_halfwidth is not None else z * target_se
+
+
+# =============================================================================
+# Option price to a target precision
+# =============================================================================
+
+def price_option_to_precision(S, K, T, r, sigma, target_se=None,
+                              target_halfwidth=None, confidence=0.95,
+                              seed=None, n_workers=1, pool=None, **kwargs):
+    """
+    Price a European call by Monte Carlo until the CI is narrow enough.
+
+    Returns a dict with price, se, halfwidth, ci, n_sims and converged.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    target = _target_halfwidth(target_se, target_halfwidth, z)
+    discount = np.exp(-r * T)
+
+    def measure(sums, n):
+        mean = sums[0] / n
+        var = max(sums[1] / n - mean**2, 0.0) * n / (n - 1)
+        return float(discount * mean), float(z * discount * math.sqrt(var / n))
+
+    task = partial(option_payoff_sums, S=S, K=K, T=T, r=r, sigma=sigma,
+                   block_size=kwargs.get("block_size", BLOCK_SIZE),
+                   seed=resolve_seed(seed))
+    result = simulate_until(task, measure, target, n_workers, pool, **kwargs)
+
+    price, halfwidth = result["estimate"], result["halfwidth"]
+    return {
+        "price": price,
+        "se": halfwidth / z,
+        "halfwidth": halfwidth,
+        "ci": (price - halfwidth, price + halfwidth),
+        "n_sims": result["n_sims"],
+        "converged": result["converged"],
+    }
+
+
+# =============================================================================
+# 95% VaR to a target precision
+# =============================================================================
+
+def var_to_precision(target_se=None, target_halfwidth=None, confidence=0.95,
+                     seed=None, n_workers=1, pool=None, **kwargs):
+    """
+    Estimate the 95% VaR of the finance_demo portfolio to a target precision.
+
+    Workers return histogram sketches (constant memory), and the CI comes
+    from order statistics: the true 5% quantile lies between the l-th and
+    u-th smallest returns, with l, u = n*p -/+ z*sqrt(n*p*(1-p)).
+    Precision can't go below the sketch bin width.
+    """
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    target = _target_halfwidth(target_se, target_halfwidth, z)
+    p = 0.05
+
+    def measure(counts, n):
+        spread = z * math.sqrt(n * p * (1 - p))
+        lower = sketch_order_stat(counts, max(int(n * p - spread), 0))
+        upper = sketch_order_stat(counts, min(int(math.ceil(n * p + spread)), n - 1))
+        return sketch_order_stat(counts, int(n * p)), (upper - lower) / 2
+
+    task = partial(summarize_returns, method="sketch",
+                   block_size=kwargs.get("block_size", BLOCK_SIZE),
+                   seed=resolve_seed(seed))
+    result = simulate_until(task, measure, target, n_workers, pool, **kwargs)
+
+    halfwidth = result["halfwidth"]
+    return {
+        "var": result["estimate"],
+        "se": halfwidth / z,
+        "halfwidth": halfwidth,
+        "ci": (result["estimate"] - halfwidth, result["estimate"] + halfwidth),
+        "n_sims": result["n_sims"],
+        "converged": result["converged"],
+    }
+
+
+def main():
+    print("\n" + "="*60)
+    print(" EARLY-STOPPING MONTE CARLO")
+    print("="*60)
+
+    print("\n[Option price to +/- $0.01 at 95% confidence]")
+    start = time.time()
+    res = price_option_to_precision(150, 155, 0.25, 0.05, 0.30,
+                                    target_halfwidth=0.01, seed=42)
+    print(f"  Price:  ${res['price']:.4f} +/- {res['halfwidth']:.4f}")
+    print(f"  Paths:  {res['n_sims']:,}  ({time.time() - start:.2f}s)")
+
+    print("\n[95% VaR to +/- 0.002% of portfolio value at 95% confidence]")
+    start = time.time()
+    res = var_to_precision(target_halfwidth=0.00002, seed=42)
+    print(f"  VaR:    {res['var']:.4%} +/- {res['halfwidth']:.4%}")
+    print(f"  Paths:  {res['n_sims']:,}  ({time.time() - start:.2f}s)")
+    print("\n  The precision you ask for sets the path count, not a guess up front.")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
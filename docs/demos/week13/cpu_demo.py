@@ -6,77 +6,178 @@ Run this script while monitoring CPU usage with btop, htop, or Activity Monitor.
 You'll see the difference between sequential (1 core) and parallel (all cores).
 
 Usage:
-    python cpu_demo.py
+    python cpu_demo.py                      # pauses before each run
 
 In another terminal, run:
     btop    # or htop, or open Activity Monitor on Mac
+
+As a scaling benchmark (no pauses, speedup curve for 1..N workers):
+    python cpu_demo.py --batch --tasks 8 --workers 8 --json cpu.json
+    python cpu_demo.py --batch --backend thread   # threads: the GIL at work
+    python cpu_demo.py --batch --backend thread-nogil  # threads on a Numba nogil loop
+    python cpu_demo.py --batch --affinity spread  # workers pinned to cores (Linux)
 """
 
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import argparse
 import multiprocessing
-import time
 import sys
+import time
+
+from affinity import POLICIES
+from benchmarks import measure, print_scaling, save_json, worker_sweep
+from instrumentation import InstrumentedExecutor, gantt, save_chrome_trace
+from worker_pool import pool_options
 
+ITERATIONS = 50_000_000  # Loop length of one task: ~3-5 seconds per core
+BACKENDS = ("process", "thread", "thread-nogil")
 
-def cpu_intensive_work(worker_id):
+
+def cpu_intensive_work(worker_id, iterations=ITERATIONS):
     """
     Burn CPU cycles for a few seconds.
     This simulates heavy computation like ML training or data processing.
     """
     total = 0
-    # 50 million iterations takes ~3-5 seconds per core
-    for i in range(50_000_000):
+    for i in range(iterations):
         total += i * i % 1000
     return worker_id, total
 
 
-def run_sequential(n_tasks):
+def cpu_intensive_work_nogil(worker_id, iterations=ITERATIONS):
+    """The same loop compiled by Numba with nogil=True (see nogil_threads.py)"""
+    from nogil_threads import cpu_work_nogil
+    return worker_id, cpu_work_nogil(iterations)
+
+
+def run_sequential(n_tasks, iterations=ITERATIONS, verbose=True):
     """Run tasks one after another (uses 1 core)"""
-    print(f"\n{'='*60}")
-    print("SEQUENTIAL EXECUTION")
-    print(f"Running {n_tasks} tasks one at a time...")
-    print("Watch your CPU monitor: Only 1 core should be at 100%")
-    print(f"{'='*60}\n")
+    if verbose:
+        print(f"\n{'='*60}")
+        print("SEQUENTIAL EXECUTION")
+        print(f"Running {n_tasks} tasks one at a time...")
+        print("Watch your CPU monitor: Only 1 core should be at 100%")
+        print(f"{'='*60}\n")
 
     start = time.time()
     results = []
     for i in range(n_tasks):
-        print(f"  Task {i+1}/{n_tasks} running...")
-        result = cpu_intensive_work(i)
+        if verbose:
+            print(f"  Task {i+1}/{n_tasks} running...")
+        result = cpu_intensive_work(i, iterations)
         results.append(result)
-        print(f"  Task {i+1}/{n_tasks} done")
+        if verbose:
+            print(f"  Task {i+1}/{n_tasks} done")
 
     elapsed = time.time() - start
-    print(f"\nSequential time: {elapsed:.1f} seconds")
+    if verbose:
+        print(f"\nSequential time: {elapsed:.1f} seconds")
     return elapsed
 
 
-def run_parallel(n_tasks, n_workers):
-    """Run tasks in parallel (uses multiple cores)"""
-    print(f"\n{'='*60}")
-    print("PARALLEL EXECUTION")
-    print(f"Running {n_tasks} tasks across {n_workers} workers...")
-    print(f"Watch your CPU monitor: {n_workers} cores should be at 100%")
-    print(f"{'='*60}\n")
+def run_parallel(n_tasks, n_workers, iterations=ITERATIONS, backend="process",
+                 verbose=True, trace=None, affinity=None):
+    """
+    Run tasks in parallel (uses multiple cores; with threads, only one)
+
+    backend="thread-nogil" runs the Numba nogil version of the loop on
+    threads, which do use every core: the GIL is released while it runs.
+    With verbose=True every task is reported with the process that ran it
+    and a timeline of the workers is printed; trace=PATH also saves the
+    timeline as a Chrome trace (see instrumentation.py). affinity pins
+    process workers to cores ("spread", "compact", "node"; see affinity.py).
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend!r} (use one of {BACKENDS})")
+    work = cpu_intensive_work
+    if backend == "thread-nogil":
+        from nogil_threads import NUMBA_AVAILABLE
+        if not NUMBA_AVAILABLE:
+            raise RuntimeError("The thread-nogil backend needs numba: pip install numba")
+        work = cpu_intensive_work_nogil
+    if verbose:
+        print(f"\n{'='*60}")
+        print("PARALLEL EXECUTION")
+        print(f"Running {n_tasks} tasks across {n_workers} {backend} workers...")
+        print(f"Watch your CPU monitor: {n_workers} cores should be at 100%")
+        print(f"{'='*60}\n")
 
     start = time.time()
-    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+    if backend == "process":
+        executor = ProcessPoolExecutor(**pool_options(n_workers, affinity, preload=()))
+    else:
+        executor = ThreadPoolExecutor(max_workers=n_workers)
+    with executor:
+        instrumented = InstrumentedExecutor(executor) if verbose or trace else executor
         # Submit all tasks
-        futures = [executor.submit(cpu_intensive_work, i) for i in range(n_tasks)]
+        futures = [instrumented.submit(work, i, iterations)
+                   for i in range(n_tasks)]
 
         # Wait for completion
         for i, future in enumerate(futures):
-            worker_id, result = future.result()
-            print(f"  Task {i+1}/{n_tasks} done (worker {worker_id})")
+            future.result()
+            if verbose:
+                record = next(r for r in instrumented.records if r["task"] == i)
+                print(f"  Task {i+1}/{n_tasks} done (pid {record['pid']}, "
+                      f"{record['cpu']:.1f}s CPU, waited {record['queue_wait']:.1f}s)")
 
     elapsed = time.time() - start
-    print(f"\nParallel time: {elapsed:.1f} seconds")
+    if verbose:
+        print(f"\nParallel time: {elapsed:.1f} seconds\n")
+        print(gantt(instrumented.records))
+    if trace:
+        save_chrome_trace(instrumented.records, trace)
     return elapsed
 
 
-def main():
+def scaling_curve(n_tasks, max_workers, iterations=ITERATIONS, backend="process",
+                  repeat=1, affinity=None):
+    """
+    Time the same n_tasks on 1, 2, ... max_workers workers.
+
+    Each point includes starting the pool, like run_parallel. Returns
+    benchmarks.worker_sweep's list: median, speedup, efficiency, ...
+    """
+    if backend == "thread-nogil":
+        cpu_intensive_work_nogil(0, 1)  # Load the compiled loop outside the timings
+    name = f"cpu/{backend}"
+    if affinity:
+        name += f"/{affinity}"
+    return worker_sweep(
+        lambda n_workers: run_parallel(n_tasks, n_workers, iterations, backend, verbose=False,
+                                       affinity=affinity),
+        max_workers, name=name, repeat=repeat, warmup=False, n_paths=n_tasks * iterations,
+    )
+
+
+def parse_args(argv=None):
+    n_cores = multiprocessing.cpu_count()
+    parser = argparse.ArgumentParser(description="CPU parallelism demo and scaling benchmark")
+    parser.add_argument("--tasks", type=int, default=min(4, n_cores),
+                        help="CPU-bound tasks per run (default: 4 or fewer)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="sweep 1..WORKERS workers (default: --tasks)")
+    parser.add_argument("--iterations", type=int, default=ITERATIONS,
+                        help="loop length of one task")
+    parser.add_argument("--backend", choices=BACKENDS, default="process",
+                        help="worker type of the parallel runs")
+    parser.add_argument("--affinity", choices=POLICIES, default=None,
+                        help="pin process workers to cores (default: let the OS place them)")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per point")
+    parser.add_argument("--json", metavar="PATH", help="save the results as JSON")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="save a Chrome trace of one run on all workers")
+    parser.add_argument("--batch", action="store_true",
+                        help="don't wait for Enter (the default without a terminal)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
     n_cores = multiprocessing.cpu_count()
-    n_tasks = min(4, n_cores)  # Use 4 tasks or fewer if limited cores
+    n_tasks = args.tasks
+    max_workers = args.workers or n_tasks
+    interactive = not args.batch and sys.stdin.isatty()
 
     print("\n" + "="*60)
     print(" CPU PARALLELISM DEMO")
@@ -86,22 +187,34 @@ def main():
     print("TIP: Open btop/htop in another terminal to watch CPU usage!")
     print("     On Mac: open Activity Monitor > CPU")
 
-    input("\nPress Enter to start SEQUENTIAL execution...")
-    seq_time = run_sequential(n_tasks)
+    if interactive:
+        input("\nPress Enter to start SEQUENTIAL execution...")
+    seq = measure(run_sequential, n_tasks, args.iterations, interactive, name="cpu/sequential",
+                  repeat=args.repeat, warmup=False, n_paths=n_tasks * args.iterations)
+
+    if interactive:
+        input(f"\nPress Enter to start PARALLEL execution (1 to {max_workers} workers)...")
+    # Watch the CPU monitor: one more core goes to 100% with every step
+    print(f"\nTiming {n_tasks} tasks on 1 to {max_workers} {args.backend} workers...")
+    curve = scaling_curve(n_tasks, max_workers, args.iterations, args.backend, args.repeat,
+                          args.affinity)
 
-    input("\nPress Enter to start PARALLEL execution...")
-    par_time = run_parallel(n_tasks, n_tasks)
+    if args.trace:
+        run_parallel(n_tasks, max_workers, args.iterations, args.backend, trace=args.trace,
+                     affinity=args.affinity)
 
     # Summary
-    speedup = seq_time / par_time
     print("\n" + "="*60)
     print(" RESULTS")
     print("="*60)
-    print(f"\n  Sequential: {seq_time:.1f}s (1 core)")
-    print(f"  Parallel:   {par_time:.1f}s ({n_tasks} cores)")
-    print(f"  Speedup:    {speedup:.1f}x faster!")
-    print(f"\n  Theoretical max speedup: {n_tasks}x")
-    print(f"  Efficiency: {(speedup/n_tasks)*100:.0f}%")
+    print(f"\n  Sequential: {seq['median']:.1f}s (1 core, no pool)\n")
+    print_scaling(curve)
+    best = max(curve, key=lambda stats: stats["speedup"])
+    print(f"\n  Best: {best['speedup']:.1f}x with {best['workers']} workers "
+          f"(theoretical max: {min(max_workers, n_tasks, n_cores)}x on this machine)")
+    if args.json:
+        save_json([seq] + curve, args.json)
+        print(f"\n  Saved to {args.json}")
     print("\n" + "="*60 + "\n")
 
 
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Worker Instrumentation - Who ran what, when, and at what cost?
+
+htop shows that cores are busy, not WHICH task kept them busy or where
+they sat idle. InstrumentedExecutor wraps a process (or thread) pool and
+records, for every task:
+
+    pid / thread     which worker ran it
+    queue wait       submitted -> started (waiting for a free worker)
+    wall / CPU time  started -> finished, and the CPU seconds it used
+    transfer         finished -> result back in the parent (pickling + pipe)
+    peak RSS         the worker's memory high-water mark so far
+    result bytes     size of the pickled result sent back
+
+From the records: a text Gantt chart (one row per worker, gaps show up as
+dots) and a Chrome trace (open chrome://tracing or https://ui.perfetto.dev
+and load the JSON file).
+
+Usage:
+    from instrumentation import InstrumentedExecutor, gantt, save_chrome_trace
+    with InstrumentedExecutor(get_pool(4)) as executor:
+        calculate_var_parallel(n_sims, 4, engine="block", method="sketch", pool=executor)
+    print(gantt(executor.records))
+    save_chrome_trace(executor.records, "var.trace.json")
+
+    python instrumentation.py    # trace a dynamically scheduled VaR run
+"""
+
+from concurrent.futures import Future
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Windows: no getrusage, peak RSS is not recorded
+    resource = None
+
+
+# =============================================================================
+# Worker side
+# =============================================================================
+
+def peak_rss():
+    """This process's peak resident memory in bytes (None where unavailable)"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024  # Linux reports KB
+
+
+def instrumented_call(fn, args, kwargs):
+    """
+    Run fn(*args, **kwargs) and return (result, record).
+
+    Timestamps are time.time() so that they compare across processes.
+    CPU time is the whole process's, so on a thread pool it includes the
+    other threads' work. The result is pickled once more to measure its
+    size: cheap next to a task, but not free for huge arrays.
+    """
+    start = time.time()
+    cpu_start = time.process_time()
+    result = fn(*args, **kwargs)
+    record = {
+        "pid": os.getpid(),
+        "tid": threading.get_ident(),
+        "start": start,
+        "end": time.time(),
+        "cpu": time.process_time() - cpu_start,
+        "peak_rss": peak_rss(),
+        "result_bytes": len(pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)),
+    }
+    return result, record
+
+
+# =============================================================================
+# Parent side
+# =============================================================================
+
+class InstrumentedExecutor:
+    """
+    Wrap an executor (ProcessPoolExecutor, ThreadPoolExecutor, WarmPool).
+
+    submit() returns an ordinary Future with the task's own result, so the
+    wrapper can be passed anywhere the executor could (borrow_executor,
+    scheduler.run_blocks, ...). Completed tasks are appended to .records.
+    Shutting the wrapper down leaves the wrapped executor running.
+    """
+
+    def __init__(self, executor):
+        self.executor = executor
+        self.records = []
+        self._lock = threading.Lock()
+        self._n_submitted = 0
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            task = self._n_submitted
+            self._n_submitted += 1
+        submitted = time.time()
+        inner = self.executor.submit(instrumented_call, fn, args, kwargs)
+        outer = Future()
+        outer.set_running_or_notify_cancel()
+
+        def done(future):
+            received = time.time()
+            try:
+                result, record = future.result()
+            except BaseException as e:
+                outer.set_exception(e)
+                return
+            record.update(
+                task=task,
+                name=_task_name(fn),
+                submitted=submitted,
+                received=received,
+                wall=record["end"] - record["start"],
+                queue_wait=record["start"] - submitted,
+                transfer=received - record["end"],
+            )
+            with self._lock:
+                self.records.append(record)
+            outer.set_result(result)
+
+        inner.add_done_callback(done)
+        return outer
+
+    def map(self, fn, *iterables):
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+        return (f.result() for f in futures)
+
+    def shutdown(self, wait=True):
+        pass  # The wrapped executor belongs to the caller
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+def _task_name(fn):
+    """fn.__name__, or the wrapped function's for a functools.partial"""
+    return getattr(fn, "__name__", None) or getattr(getattr(fn, "func", None), "__name__",
+                                                    repr(fn))
+
+
+def _worker_key(record):
+    return record["pid"], record["tid"]
+
+
+def worker_summary(records):
+    """
+    Per worker: tasks, busy seconds, CPU seconds, utilization and finish time.
+
+    Utilization is busy time over the whole run (first submit to last
+    result); the worker that finishes last, well after the others, is the
+    straggler.
+    """
+    if not records:
+        return []
+    t0 = min(r["submitted"] for r in records)
+    t1 = max(r["received"] for r in records)
+    rows = []
+    for key in sorted({_worker_key(r) for r in records}):
+        mine = [r for r in records if _worker_key(r) == key]
+        busy = sum(r["wall"] for r in mine)
+        rows.append({
+            "pid": key[0],
+            "tid": key[1],
+            "tasks": len(mine),
+            "busy": busy,
+            "cpu": sum(r["cpu"] for r in mine),
+            "utilization": busy / (t1 - t0) if t1 > t0 else 1.0,
+            "finished": max(r["end"] for r in mine) - t0,
+            "peak_rss": max((r["peak_rss"] or 0) for r in mine) or None,
+            "result_bytes": sum(r["result_bytes"] for r in mine),
+            "queue_wait": sum(r["queue_wait"] for r in mine),
+        })
+    return rows
+
+
+def gantt(records, width=60):
+    """
+    Text timeline: one row per worker, '#' while it runs a task, '.' idle.
+
+    Each row ends with the worker's task count and utilization.
+    """
+    if not records:
+        return "(no tasks recorded)"
+    t0 = min(r["submitted"] for r in records)
+    t1 = max(r["received"] for r in records)
+    scale = width / (t1 - t0) if t1 > t0 else 0.0
+    summary = {(row["pid"], row["tid"]): row for row in worker_summary(records)}
+    threads = len({r["pid"] for r in records}) < len(summary)  # Several workers per process
+    lines = [f"  {'Worker':<10} |{'0s':<{width // 2}}{f'{t1 - t0:.2f}s':>{width - width // 2}}|"]
+    for i, key in enumerate(sorted(summary)):
+        row = ["."] * width
+        for r in records:
+            if _worker_key(r) != key:
+                continue
+            lo = int((r["start"] - t0) * scale)
+            hi = max(lo + 1, int(round((r["end"] - t0) * scale)))
+            row[lo:min(hi, width)] = "#" * (min(hi, width) - lo)
+        label = f"thread {i}" if threads else f"pid {key[0]}"
+        stats = summary[key]
+        lines.append(f"  {label:<10} |{''.join(row)}| {stats['tasks']:>3} tasks "
+                     f"{stats['utilization']:>4.0%} busy")
+    return "\n".join(lines)
+
+
+def chrome_trace(records):
+    """
+    Records as Chrome trace events (the "traceEvents" JSON format).
+
+    One complete event ("ph": "X") per task on its worker's track, with
+    queue wait, CPU time, RSS and result size in the event's args.
+    """
+    if not records:
+        return {"traceEvents": []}
+    t0 = min(r["submitted"] for r in records)
+    us = 1e6
+    events = []
+    for pid in sorted({r["pid"] for r in records}):
+        events.append({"name": "process_name", "ph": "M", "pid": pid,
+                       "args": {"name": f"worker {pid}"}})
+    for r in sorted(records, key=lambda r: r["start"]):
+        events.append({
+            "name": r["name"],
+            "cat": "task",
+            "ph": "X",
+            "ts": (r["start"] - t0) * us,
+            "dur": r["wall"] * us,
+            "pid": r["pid"],
+            "tid": r["tid"],
+            "args": {
+                "task": r["task"],
+                "queue_wait_ms": r["queue_wait"] * 1e3,
+                "transfer_ms": r["transfer"] * 1e3,
+                "cpu_s": r["cpu"],
+                "peak_rss_mb": r["peak_rss"] / 1e6 if r["peak_rss"] else None,
+                "result_bytes": r["result_bytes"],
+            },
+        })
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def save_chrome_trace(records, path):
+    with open(path, "w") as f:
+        json.dump(chrome_trace(records), f)
+    return path
+
+
+def print_summary(records):
+    print(f"  {'Worker':>10} {'Tasks':>6} {'Busy':>8} {'CPU':>8} {'Util':>6} "
+          f"{'Finished':>9} {'Queue':>8} {'Peak RSS':>9} {'Sent':>9}")
+    for row in worker_summary(records):
+        rss = f"{row['peak_rss'] / 1e6:.0f} MB" if row["peak_rss"] else "-"
+        print(f"  {row['pid']:>10} {row['tasks']:>6} {row['busy']:>7.2f}s {row['cpu']:>7.2f}s "
+              f"{row['utilization']:>6.0%} {row['finished']:>8.2f}s {row['queue_wait']:>7.2f}s "
+              f"{rss:>9} {row['result_bytes'] / 1e3:>6.1f} kB")
+
+
+def main():
+    import multiprocessing
+    from finance_demo import calculate_var_parallel
+    from worker_pool import get_pool
+
+    n_sims = 5_000_000
+    n_workers = min(4, multiprocessing.cpu_count())
+    path = "var_trace.json"
+
+    print("\n" + "="*60)
+    print(" WHERE DID THE TIME GO? (per-worker instrumentation)")
+    print("="*60)
+    print(f"\n95% VaR, {n_sims:,} simulations, block engine, sketch, dynamic schedule, "
+          f"{n_workers} warm workers\n")
+
+    executor = InstrumentedExecutor(get_pool(n_workers))
+    start = time.perf_counter()
+    var = calculate_var_parallel(n_sims, n_workers, engine="block", method="sketch", seed=42,
+                                 pool=executor, schedule="dynamic")
+    elapsed = time.perf_counter() - start
+    print(f"  VaR {var:.4%} in {elapsed:.2f}s, {len(executor.records)} tasks\n")
+
+    print(gantt(executor.records))
+    print()
+    print_summary(executor.records)
+    print(f"\n  Chrome trace: {save_chrome_trace(executor.records, path)} "
+          f"(load it in chrome://tracing or ui.perfetto.dev)")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
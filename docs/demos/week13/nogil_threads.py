@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Threads That Really Run in Parallel - Numba's nogil=True
+
+Exercise 2 showed that threads don't speed up slow_sum: only one thread at a
+time can run Python code (the GIL). Processes work, but every task and
+result is pickled through a pipe, and each process needs its own copy of
+the data.
+
+A Numba function compiled with nogil=True releases the GIL while it runs.
+Then plain threads run on all cores, AND they share memory:
+
+    threads + nogil:  no process start-up, no pickling, workers write
+                      straight into one shared NumPy array
+    processes:        start-up + pickling, but works for any Python code
+
+Usage:
+    pip install numba numpy
+    python nogil_threads.py
+    python cpu_demo.py --batch --backend thread-nogil   # scaling curve on threads
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import multiprocessing
+import time
+
+import numpy as np
+
+from finance_demo import MU, SIGMA, WEIGHTS
+from rng_streams import CHUNK_SIZE, chunk_seeds, partition_chunks, resolve_seed
+from worker_pool import borrow_executor
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+
+# =============================================================================
+# nogil kernels
+# =============================================================================
+
+if NUMBA_AVAILABLE:
+    @njit("float64(int64)", nogil=True, cache=True)
+    def sum_squares_nogil(n):
+        """slow_sum from the live-coding exercises, without the GIL"""
+        total = 0.0  # float: the integer sum overflows int64 for large n
+        for i in range(n):
+            total += i * i
+        return total
+
+    @njit("int64(int64)", nogil=True, cache=True)
+    def cpu_work_nogil(n):
+        """cpu_demo.cpu_intensive_work's loop, without the GIL"""
+        total = 0
+        for i in range(n):
+            total += i * i % 1000
+        return total
+
+    @njit("void(float64[::1], float64[::1], float64[::1], uint32[::1], int64, float64[::1])",
+          nogil=True, cache=True)
+    def simulate_var_chunks(weights, mu, sigma, seeds, first_chunk, out):
+        """
+        Fill `out` with portfolio returns for chunks first_chunk, ...
+
+        `out` is a slice (a view) of the caller's array, so every thread
+        writes its part of the result in place. Same streams as var_numba.
+        """
+        for i in range(len(out)):
+            if i % CHUNK_SIZE == 0:
+                np.random.seed(seeds[first_chunk + i // CHUNK_SIZE])
+            total = 0.0
+            for j in range(len(weights)):
+                total += weights[j] * (mu[j] + sigma[j] * np.random.randn())
+            out[i] = total
+
+
+# =============================================================================
+# Thread driver
+# =============================================================================
+
+def map_threads(fn, args_list, n_workers=None):
+    """
+    fn(*args) for every args tuple, on a thread pool.
+
+    Arguments are passed by reference: NumPy arrays are shared, never
+    copied or pickled. Only worth it when fn releases the GIL.
+    """
+    n_workers = n_workers or multiprocessing.cpu_count()
+    with ThreadPoolExecutor(max_workers=n_workers) as executor:
+        futures = [executor.submit(fn, *args) for args in args_list]
+        return [f.result() for f in futures]
+
+
+def var_threads(n_sims, n_workers=None, weights=WEIGHTS, mu=MU, sigma=SIGMA,
+                seed=None):
+    """
+    95% VaR with nogil threads writing into one shared returns array.
+
+    Each thread simulates a run of whole chunks into its own slice, so the
+    answer doesn't depend on n_workers (and matches var_numba up to
+    rounding).
+    """
+    if not NUMBA_AVAILABLE:
+        raise RuntimeError("var_threads needs numba: pip install numba")
+    n_workers = n_workers or multiprocessing.cpu_count()
+    seeds = chunk_seeds(resolve_seed(seed), n_sims)
+    returns = np.empty(n_sims)
+    tasks = []
+    for first_chunk, n in partition_chunks(n_sims, n_workers):
+        start = first_chunk * CHUNK_SIZE
+        tasks.append((weights, mu, sigma, seeds, first_chunk, returns[start:start + n]))
+    map_threads(simulate_var_chunks, tasks, n_workers)
+
+    idx = int(n_sims * 0.05)
+    returns.partition(idx)
+    return returns[idx]
+
+
+def var_processes(n_sims, n_workers=None, weights=WEIGHTS, mu=MU, sigma=SIGMA,
+                  seed=None, pool=None):
+    """
+    The same kernel on a process pool, for comparison.
+
+    Every part is simulated into a worker-local array that is pickled
+    back to the parent and concatenated.
+    """
+    n_workers = n_workers or multiprocessing.cpu_count()
+    seeds = chunk_seeds(resolve_seed(seed), n_sims)
+    with borrow_executor(pool, n_workers) as executor:
+        futures = [executor.submit(_simulate_part, weights, mu, sigma, seeds, first, n)
+                   for first, n in partition_chunks(n_sims, n_workers)]
+        returns = np.concatenate([f.result() for f in futures])
+    idx = int(n_sims * 0.05)
+    returns.partition(idx)
+    return returns[idx]
+
+
+def _simulate_part(weights, mu, sigma, seeds, first_chunk, n):
+    """Process-pool task: simulate n returns and send them back"""
+    out = np.empty(n)
+    simulate_var_chunks(weights, mu, sigma, seeds, first_chunk, out)
+    return out
+
+
+def main():
+    if not NUMBA_AVAILABLE:
+        print("This demo needs numba: pip install numba")
+        return
+
+    n_workers = min(4, multiprocessing.cpu_count())
+    n_tasks, n = 4, 500_000_000
+    n_sims = 5_000_000
+
+    print("\n" + "="*60)
+    print(" THREADS + nogil vs PROCESSES")
+    print("="*60)
+    print(f"\n{n_workers} workers on {multiprocessing.cpu_count()} cores\n")
+
+    # Compile / load from cache before timing anything
+    sum_squares_nogil(10)
+    var_threads(CHUNK_SIZE, 1, seed=42)
+
+    print(f"[{n_tasks} x sum of squares to {n:,}]")
+    start = time.perf_counter()
+    for _ in range(n_tasks):
+        sum_squares_nogil(n)
+    t_seq = time.perf_counter() - start
+    print(f"  One thread:        {t_seq:.2f}s")
+
+    start = time.perf_counter()
+    map_threads(sum_squares_nogil, [(n,)] * n_tasks, n_workers)
+    t_threads = time.perf_counter() - start
+    print(f"  Threads + nogil:   {t_threads:.2f}s  ({t_seq / t_threads:.1f}x)")
+
+    with borrow_executor(None, n_workers) as executor:
+        start = time.perf_counter()
+        list(executor.map(sum_squares_nogil, [n] * n_tasks))
+        t_procs = time.perf_counter() - start
+    print(f"  Processes:         {t_procs:.2f}s  ({t_seq / t_procs:.1f}x, incl. start-up)")
+
+    from cpu_demo import cpu_intensive_work, cpu_intensive_work_nogil
+    cpu_intensive_work_nogil(0, 1)
+    print(f"\n[{n_tasks} x cpu_demo's loop on threads: the GIL vs nogil]")
+    for label, fn, iterations in (("Python (GIL)", cpu_intensive_work, 5_000_000),
+                                  ("Numba nogil", cpu_intensive_work_nogil, 200_000_000)):
+        args_list = [(i, iterations) for i in range(n_tasks)]
+        start = time.perf_counter()
+        for args in args_list:
+            fn(*args)
+        t_one = time.perf_counter() - start
+        start = time.perf_counter()
+        map_threads(fn, args_list, n_workers)
+        t_threads = time.perf_counter() - start
+        print(f"  {label:<13} {iterations:>11,} iterations: one thread {t_one:.2f}s, "
+              f"{n_workers} thread(s) {t_threads:.2f}s ({t_one / t_threads:.1f}x)")
+
+    print(f"\n[95% VaR, {n_sims:,} simulations]")
+    start = time.perf_counter()
+    var_thr = var_threads(n_sims, n_workers, seed=42)
+    t_var_threads = time.perf_counter() - start
+    print(f"  Threads + nogil:   {t_var_threads:.2f}s  (VaR {var_thr:.4%}, "
+          f"shared array, nothing pickled)")
+
+    with borrow_executor(None, n_workers) as pool:
+        pool.submit(_simulate_part, WEIGHTS, MU, SIGMA, chunk_seeds(42, 1), 0, 1).result()
+        start = time.perf_counter()
+        var_proc = var_processes(n_sims, n_workers, seed=42, pool=pool)
+        t_var_procs = time.perf_counter() - start
+    print(f"  Processes (warm):  {t_var_procs:.2f}s  (VaR {var_proc:.4%}, "
+          f"{n_sims * 8 / 1e6:.0f} MB pickled back)")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
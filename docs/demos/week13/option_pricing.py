@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Option Pricing - Closed form when we can, Monte Carlo when we must
+
+1. Price surface from one simulation: pricing 8 strikes with 8 separate
+   Monte Carlo runs simulates the same stock 8 times. The paths don't depend
+   on the strike (and a European price only on its maturity's S_T), so
+   draw once and evaluate every strike and maturity on the same draws.
+2. Black-Scholes fast path: a plain European option has an exact formula,
+   so price_contract() only falls back to Monte Carlo for payoffs that
+   don't have one.
+
+Usage:
+    python option_pricing.py
+
+    from option_pricing import price_option_grid, price_contract
+    surface = price_option_grid(100, strikes, maturities, 0.05, 0.2, 1_000_000)
+    surface[i, j]  # price for maturities[i], strikes[j]
+    prices = price_contract(100, strikes, 1.0, 0.05, 0.2)  # closed form
+"""
+
+import math
+import time
+
+import numpy as np
+
+from path_engine import EXOTIC_STYLES, price_exotic
+from rng_streams import CHUNK_SIZE, chunk_rng, resolve_seed
+
+try:
+    from scipy.special import ndtr  # Fast vectorized normal CDF
+except ImportError:
+    _erf = np.vectorize(math.erf)
+
+    def ndtr(x):
+        """Standard normal CDF (slower fallback without scipy)"""
+        return 0.5 * (1.0 + _erf(np.asarray(x) / math.sqrt(2.0)))
+
+ANALYTIC_STYLES = ("european",)  # Contracts with a closed-form price
+CHECK_Z = 4.0  # MC vs closed form disagreement (in std errors) that fails a check
+
+
+# =============================================================================
+# Price surface from one simulation
+# =============================================================================
+
+def _segment_sums(x, starts):
+    """Sums of x[starts[k]:starts[k + 1]], the last one to the end (starts ascending)"""
+    sums = np.zeros(len(starts))
+    inside = starts < len(x)  # Segments starting at the end are empty
+    if inside.any():
+        idx = starts[inside]
+        part = np.add.reduceat(x, idx)
+        part[np.append(idx[1:], len(x)) == idx] = 0.0  # reduceat's other empty segments
+        sums[inside] = part
+    return sums
+
+
+def strike_payoff_sums(Z, mean_log, vol, strikes_sorted, option="call"):
+    """
+    Count, sum and sum of squares of ST over the paths where each strike pays.
+
+    Z must be sorted, so ST = exp(mean_log + vol * Z) is sorted too: the
+    paths above a strike are a suffix of the array (a prefix for puts),
+    found with one binary search per strike on Z. One pass sums ST between
+    consecutive strikes, and a cumulative sum over those few segments gives
+    the totals. Only the paths that pay at the outermost strike are used.
+    """
+    n = len(Z)
+    with np.errstate(divide="ignore", invalid="ignore"):  # vol = 0 at T = 0
+        pos = np.searchsorted(Z, (np.log(strikes_sorted) - mean_log) / vol, side="right")
+    if option == "call":  # Paths with ST > K: from pos to the end
+        ST = np.exp(mean_log + vol * Z[pos[0]:])
+        starts = pos - pos[0]
+        sums = _segment_sums(ST, starts)
+        sq_sums = _segment_sums(np.square(ST, out=ST), starts)
+        return n - pos, np.cumsum(sums[::-1])[::-1], np.cumsum(sq_sums[::-1])[::-1]
+    # Puts: ST <= K, the first pos paths
+    ST = np.exp(mean_log + vol * Z[:pos[-1]])
+    starts = np.concatenate([[0], pos[:-1]])
+    sums = _segment_sums(ST, starts)
+    sq_sums = _segment_sums(np.square(ST, out=ST), starts)
+    return pos, np.cumsum(sums), np.cumsum(sq_sums)
+
+
+def price_option_grid(S, strikes, maturities, r, sigma, n_sims, seed=None,
+                      option="call", block_size=CHUNK_SIZE, return_se=False):
+    """
+    Price European options for every (maturity, strike) pair.
+
+    A European price depends only on the distribution of S_T at its own
+    maturity, so one normal draw per path serves every maturity, scaled by
+    sigma * sqrt(T). The draws are sorted once per block; after that each
+    maturity costs one pass over the paths and extra strikes are nearly
+    free. Returns an array of shape (len(maturities), len(strikes)), plus
+    the matching standard errors if return_se=True.
+    """
+    if option not in ("call", "put"):
+        raise ValueError(f"Unknown option type: {option!r} (use 'call' or 'put')")
+
+    seed = resolve_seed(seed)
+    strikes = np.asarray(strikes, dtype=float)
+    maturities = np.asarray(maturities, dtype=float)
+    k_order = np.argsort(strikes)
+    t_order = np.argsort(maturities)
+    Ks = strikes[k_order]
+    Ts = maturities[t_order]
+
+    # log S_T = mean_log + vol * Z at every maturity
+    mean_log = np.log(S) + (r - 0.5 * sigma**2) * Ts
+    vol = sigma * np.sqrt(Ts)
+
+    payoff_sums = np.zeros((len(Ts), len(Ks)))
+    payoff_sq_sums = np.zeros((len(Ts), len(Ks)))
+    for j, start in enumerate(range(0, n_sims, block_size)):
+        n = min(block_size, n_sims - start)
+        Z = chunk_rng(seed, j).standard_normal(n)
+        Z.sort()
+        for t in range(len(Ts)):
+            count, total, total_sq = strike_payoff_sums(Z, mean_log[t], vol[t], Ks, option)
+            if option == "put":
+                payoff_sums[t] += Ks * count - total
+            else:
+                payoff_sums[t] += total - Ks * count
+            # sum of (ST - K)^2 over the paths that pay (same for puts)
+            payoff_sq_sums[t] += total_sq - 2 * Ks * total + Ks**2 * count
+
+    discount = np.exp(-r * Ts)[:, None]
+    mean = payoff_sums / n_sims
+    prices = discount * mean
+    se = discount * np.sqrt(np.maximum(payoff_sq_sums / n_sims - mean**2, 0.0)
+                            / (n_sims - 1))
+
+    # Back to the caller's order of maturities and strikes
+    surface = np.empty_like(prices)
+    surface[np.ix_(t_order, k_order)] = prices
+    if not return_se:
+        return surface
+    surface_se = np.empty_like(se)
+    surface_se[np.ix_(t_order, k_order)] = se
+    return surface, surface_se
+
+
+# =============================================================================
+# Black-Scholes fast path
+# =============================================================================
+
+def black_scholes(S, K, T, r, sigma, option="call"):
+    """
+    Closed-form Black-Scholes price of a European option.
+
+    All arguments broadcast like NumPy arrays, so thousands of quotes are
+    priced in one vectorized call.
+    """
+    S, K, T, r, sigma = np.broadcast_arrays(*(np.asarray(x, dtype=float)
+                                               for x in (S, K, T, r, sigma)))
+    vol = sigma * np.sqrt(T)
+    d1 = (np.log(S / K) + (r + 0.5 * sigma**2) * T) / vol
+    d2 = d1 - vol
+    discounted_K = K * np.exp(-r * T)
+    if option == "call":
+        return S * ndtr(d1) - discounted_K * ndtr(d2)
+    if option == "put":
+        return discounted_K * ndtr(-d2) - S * ndtr(-d1)
+    raise ValueError(f"Unknown option type: {option!r} (use 'call' or 'put')")
+
+
+def price_european_mc(S, K, T, r, sigma, option="call", n_sims=1_000_000,
+                      seed=None, return_se=False):
+    """
+    Monte Carlo price of European options, for any array of strikes/maturities.
+
+    S, r and sigma must be scalars; all (K, T) pairs share one simulation
+    via price_option_grid.
+    """
+    K, T = np.broadcast_arrays(np.asarray(K, dtype=float), np.asarray(T, dtype=float))
+    strikes, k_idx = np.unique(K, return_inverse=True)
+    maturities, t_idx = np.unique(T, return_inverse=True)
+    surface, se = price_option_grid(S, strikes, maturities, r, sigma, n_sims,
+                                    seed, option, return_se=True)
+    prices = surface[t_idx, k_idx].reshape(K.shape)
+    if not return_se:
+        return prices
+    return prices, se[t_idx, k_idx].reshape(K.shape)
+
+
+def price_contract(S, K, T, r, sigma, option="call", style="european",
+                   method="auto", n_sims=1_000_000, seed=None,
+                   barrier=np.inf, n_steps=252):
+    """
+    Price option contracts with the fastest correct engine.
+
+    method="auto":     closed form if the style has one, else Monte Carlo
+    method="analytic": closed form only (error if there isn't one)
+    method="mc":       always Monte Carlo
+
+    Path-dependent styles ("asian", "barrier", "lookback") are calls priced
+    by path_engine on n_steps monitoring dates, one contract at a time.
+    """
+    if method not in ("auto", "analytic", "mc"):
+        raise ValueError(f"Unknown method: {method!r} (use 'auto', 'analytic' or 'mc')")
+
+    if style in EXOTIC_STYLES and any(np.ndim(x) for x in (S, K, T, r, sigma)):
+        raise ValueError(f"Array strikes (or other inputs) are only supported for european "
+                         f"style, not {style!r}: price one contract at a time")
+
+    analytic = style in ANALYTIC_STYLES
+    if method == "analytic" and not analytic:
+        raise ValueError(f"No closed form for {style!r} options")
+
+    if analytic and method != "mc":
+        return black_scholes(S, K, T, r, sigma, option)
+    if style == "european":
+        return price_european_mc(S, K, T, r, sigma, option, n_sims, seed)
+    if style in EXOTIC_STYLES:
+        if option != "call":
+            raise ValueError(f"Only calls are supported for {style!r} options")
+        price, _ = price_exotic(style, S, K, T, r, sigma, n_sims, n_steps,
+                                barrier, seed)
+        return price
+    raise ValueError(f"Unknown option style: {style!r}")
+
+
+def cross_check(S, K, T, r, sigma, option="call", n_sims=1_000_000, seed=None):
+    """
+    Compare the closed form with Monte Carlo on the same contracts.
+
+    z is the gap in Monte Carlo standard errors; |z| above CHECK_Z means one
+    of the two engines is wrong, not just noisy.
+    """
+    bs = black_scholes(S, K, T, r, sigma, option)
+    mc, se = price_european_mc(S, K, T, r, sigma, option, n_sims, seed,
+                               return_se=True)
+    z = (mc - bs) / se
+    return {
+        "analytic": bs,
+        "mc": mc,
+        "se": se,
+        "z": z,
+        "ok": bool(np.all(np.abs(z) < CHECK_Z)),
+    }
+
+
+def main():
+    S, r, sigma, n_sims = 100, 0.05, 0.2, 1_000_000
+    strikes = np.linspace(60, 140, 50)
+    maturities = np.linspace(0.1, 2.0, 20)
+
+    print("\n" + "="*60)
+    print(" OPTION PRICE SURFACE FROM ONE SIMULATION")
+    print("="*60)
+    print(f"\n{n_sims:,} paths, {len(maturities)} maturities x {len(strikes)} strikes\n")
+
+    start = time.time()
+    one = price_option_grid(S, [100], [1.0], r, sigma, n_sims, seed=42)
+    t_one = time.time() - start
+    print(f"  One option:        {t_one:.3f}s  (price: ${one[0, 0]:.4f})")
+
+    start = time.time()
+    price_option_grid(S, strikes, [1.0], r, sigma, n_sims, seed=42)
+    t_smile = time.time() - start
+    print(f"  {len(strikes)} strikes:        {t_smile:.3f}s  ({t_smile / t_one:.1f}x one option)")
+
+    # The same sorted draws serve every maturity: one pass over the paths per
+    # maturity, and nothing extra per strike
+    start = time.time()
+    surface = price_option_grid(S, strikes, maturities, r, sigma, n_sims, seed=42)
+    t_grid = time.time() - start
+    print(f"  {surface.size} options:     {t_grid:.3f}s  ({t_grid / t_one:.1f}x one option)")
+    print(f"  vs one run each:   ~{t_one * surface.size:.0f}s")
+
+    print("\n[Black-Scholes fast path]")
+    n_quotes = 10_000
+    rng = np.random.default_rng(42)
+    K = rng.uniform(60, 140, n_quotes)
+    T = rng.uniform(0.1, 2.0, n_quotes)
+    start = time.perf_counter()
+    price_contract(S, K, T, r, sigma)
+    elapsed = time.perf_counter() - start
+    print(f"  {n_quotes:,} European quotes: {elapsed * 1000:.1f} ms "
+          f"({elapsed / n_quotes * 1e6:.2f} us per quote)")
+
+    check = cross_check(S, strikes, 1.0, r, sigma, n_sims=n_sims, seed=42)
+    print(f"  MC cross-check on {len(strikes)} strikes: max |z| = "
+          f"{np.abs(check['z']).max():.2f}  ({'OK' if check['ok'] else 'MISMATCH'})")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Scaling Study - How many cores is a job worth paying for?
+
+Two ways to add workers:
+
+    strong scaling:  same total work, more workers    -> does it get faster?
+    weak scaling:    same work PER worker, more workers -> does it stay as fast?
+
+Fitting the timings to two classic laws gives one number per kernel, the
+serial fraction s (the part of the run that doesn't parallelize: pool
+overhead, combining results, memory bandwidth, ...):
+
+    Amdahl (strong):     speedup(p) = 1 / (s + (1 - s) / p)    -> at most 1/s
+    Gustafson (weak):    scaled speedup(p) = p - s * (p - 1)
+
+With s from a small machine you can predict a big one: Amdahl's efficiency
+drops below 50% at p = (1 + s) / s cores, beyond which extra cores mostly
+wait.
+
+Every kernel runs on a warm process pool (worker_pool.get_pool) with its
+work split into runs of whole chunks, like the rest of the week.
+
+Usage:
+    python scaling.py                              # all kernels, 1..all cores
+    python scaling.py --kernels estimate_pi var --workers 8 --json scaling.json
+    python scaling.py --plot scaling.png           # needs matplotlib
+"""
+
+import argparse
+import multiprocessing
+
+import numpy as np
+
+from benchmarks import REPEAT, measure, print_scaling, save_json
+from rng_streams import CHUNK_SIZE, partition_chunks, resolve_seed
+from worker_pool import get_pool
+
+# Work per worker (weak scaling) = total work (strong scaling), ~1s on one core
+WORK = {
+    "cpu_intensive_work": 5_000_000,  # loop iterations
+    "slow_sum": 10_000_000,           # loop iterations
+    "estimate_pi": 10_000_000,        # random points
+    "price_option": 10_000_000,       # paths
+    "var": 2_000_000,                 # simulations
+}
+KERNELS = tuple(WORK)
+MODES = ("strong", "weak")
+OPTION = (150.0, 155.0, 0.25, 0.05, 0.30)  # S, K, T, r, sigma
+
+
+# =============================================================================
+# Kernels: n units of work split over n_workers processes
+# =============================================================================
+
+def run_kernel(kernel, n, n_workers, pool, seed=0):
+    """
+    Do n units of `kernel`'s work as n_workers parts on `pool`.
+
+    The Monte Carlo kernels return their estimate (the same for any
+    n_workers); cpu_intensive_work and slow_sum only burn CPU, so their
+    per-part results are returned as they are.
+    """
+    if kernel == "var":
+        from finance_demo import calculate_var_parallel
+        return calculate_var_parallel(n, n_workers, "block", method="tail", seed=seed,
+                                      pool=pool, schedule="static")
+    if kernel == "cpu_intensive_work":
+        from cpu_demo import cpu_intensive_work
+        return _run_parts(pool, cpu_intensive_work, n, n_workers, lambda first, m: (first, m))
+    if kernel == "slow_sum":
+        from live_coding_solutions import slow_sum
+        return _run_parts(pool, slow_sum, n, n_workers, lambda first, m: (m,))
+    if kernel == "estimate_pi":
+        from backends import pi_hits_numpy
+        parts = _run_parts(pool, pi_hits_numpy, n, n_workers,
+                           lambda first, m: (m, seed, first))
+        return 4 * sum(parts) / n
+    if kernel == "price_option":
+        from convergence import option_payoff_sums
+        S, K, T, r, sigma = OPTION
+        parts = _run_parts(pool, option_payoff_sums, n, n_workers,
+                           lambda first, m: (m, S, K, T, r, sigma, CHUNK_SIZE, seed, first))
+        return np.exp(-r * T) * sum(p[0] for p in parts) / n
+    raise ValueError(f"Unknown kernel: {kernel!r} (use one of {KERNELS})")
+
+
+def _run_parts(pool, fn, n, n_workers, part_args):
+    """fn(*part_args(first_chunk, n_part)) for every part of n, in order"""
+    futures = [pool.submit(fn, *part_args(first, m))
+               for first, m in partition_chunks(n, n_workers)]
+    return [f.result() for f in futures]
+
+
+# =============================================================================
+# Strong and weak scaling curves
+# =============================================================================
+
+def scaling_curve(kernel, mode="strong", work=None, max_workers=None, repeat=REPEAT,
+                  seed=None):
+    """
+    Time `kernel` on 1, 2, ... max_workers warm processes.
+
+    mode="strong": `work` units in total, whatever the number of workers
+    mode="weak":   `work` units per worker (p * work in total)
+
+    Returns a list of benchmarks.measure dicts with workers, speedup,
+    efficiency and the Karp-Flatt serial fraction of every point. For weak
+    scaling, speedup is the scaled speedup p * T(1) / T(p).
+    """
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode: {mode!r} (use one of {MODES})")
+    work = work or WORK[kernel]
+    max_workers = max_workers or multiprocessing.cpu_count()
+    seed = resolve_seed(seed)
+    curve = []
+    for p in range(1, max_workers + 1):
+        pool = get_pool(p)
+        n = work if mode == "strong" else work * p
+        stats = measure(run_kernel, kernel, n, p, pool, seed, name=f"{kernel}/{mode}/{p}w",
+                        repeat=repeat, n_paths=n)
+        t1 = curve[0]["median"] if curve else stats["median"]
+        stats.update(kernel=kernel, mode=mode, workers=p)
+        stats["speedup"] = (1 if mode == "strong" else p) * t1 / stats["median"]
+        stats["efficiency"] = stats["speedup"] / p
+        stats["serial_fraction"] = _karp_flatt(stats["speedup"], p, mode)
+        curve.append(stats)
+    return curve
+
+
+def _karp_flatt(speedup, p, mode):
+    """Serial fraction implied by a single point (None for p = 1)"""
+    if p == 1:
+        return None
+    if mode == "strong":
+        return (1 / speedup - 1 / p) / (1 - 1 / p)
+    return (p - speedup) / (p - 1)
+
+
+def fit_amdahl(workers, speedups):
+    """
+    Least-squares serial fraction s of Amdahl's law.
+
+    1/speedup - 1/p = s * (1 - 1/p) is linear in s, so the fit is one
+    regression through the origin. Clipped to [0, 1].
+    """
+    p = np.asarray(workers, dtype=float)
+    x = 1 - 1 / p
+    y = 1 / np.asarray(speedups, dtype=float) - 1 / p
+    if not x.any():
+        return None
+    return float(np.clip(x @ y / (x @ x), 0.0, 1.0))
+
+
+def fit_gustafson(workers, speedups):
+    """Least-squares serial fraction s of Gustafson's law: p - speedup = s * (p - 1)"""
+    p = np.asarray(workers, dtype=float)
+    x = p - 1
+    y = p - np.asarray(speedups, dtype=float)
+    if not x.any():
+        return None
+    return float(np.clip(x @ y / (x @ x), 0.0, 1.0))
+
+
+def amdahl_speedup(s, p):
+    return 1 / (s + (1 - s) / p)
+
+
+def gustafson_speedup(s, p):
+    return p - s * (p - 1)
+
+
+def half_efficiency_cores(s):
+    """Cores at which Amdahl's efficiency falls to 50% (inf if s == 0)"""
+    return (1 + s) / s if s > 0 else float("inf")
+
+
+def scaling_study(kernels=KERNELS, modes=MODES, max_workers=None, repeat=REPEAT,
+                  scale=1.0, seed=None):
+    """
+    Strong and/or weak curves plus fitted serial fractions for every kernel.
+
+    scale multiplies the default WORK of each kernel. Returns
+    {"curves": {(kernel, mode): curve}, "fits": {kernel: {"amdahl": s,
+    "gustafson": s}}}.
+    """
+    curves, fits = {}, {}
+    for kernel in kernels:
+        fits[kernel] = {}
+        for mode in modes:
+            curve = scaling_curve(kernel, mode, int(WORK[kernel] * scale), max_workers,
+                                  repeat, seed)
+            curves[kernel, mode] = curve
+            fit = fit_amdahl if mode == "strong" else fit_gustafson
+            law = "amdahl" if mode == "strong" else "gustafson"
+            fits[kernel][law] = fit([c["workers"] for c in curve],
+                                    [c["speedup"] for c in curve])
+    return {"curves": curves, "fits": fits}
+
+
+def plot_study(study, path):
+    """Speedup curves with the fitted laws and the ideal line, saved to `path`"""
+    try:
+        import matplotlib
+        matplotlib.use("Agg")
+        import matplotlib.pyplot as plt
+    except ImportError:
+        raise ImportError("Plotting needs matplotlib: pip install matplotlib")
+
+    modes = sorted({mode for _, mode in study["curves"]}, key=MODES.index)
+    fig, axes = plt.subplots(1, len(modes), figsize=(6 * len(modes), 4.5), squeeze=False)
+    for ax, mode in zip(axes[0], modes):
+        law, model = ("amdahl", amdahl_speedup) if mode == "strong" else \
+                     ("gustafson", gustafson_speedup)
+        max_p = 1
+        for (kernel, m), curve in study["curves"].items():
+            if m != mode:
+                continue
+            p = [c["workers"] for c in curve]
+            line, = ax.plot(p, [c["speedup"] for c in curve], "o", label=kernel)
+            s = study["fits"][kernel].get(law)
+            if s is not None:
+                grid = np.linspace(1, max(p), 50)
+                ax.plot(grid, model(s, grid), "-", color=line.get_color(), alpha=0.6)
+            max_p = max(max_p, max(p))
+        ax.plot([1, max_p], [1, max_p], "k--", label="ideal")
+        ax.set_title(f"{mode.capitalize()} scaling ({law.capitalize()} fit)")
+        ax.set_xlabel("Workers")
+        ax.set_ylabel("Speedup" if mode == "strong" else "Scaled speedup")
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+    return path
+
+
+def _fmt(s):
+    return f"{s:.3f}" if s is not None else "-"
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Strong and weak scaling study")
+    parser.add_argument("--kernels", nargs="+", choices=KERNELS, default=list(KERNELS))
+    parser.add_argument("--mode", choices=MODES + ("both",), default="both")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="sweep 1..WORKERS processes (default: all cores)")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per point")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply every kernel's default work")
+    parser.add_argument("--json", metavar="PATH", help="save curves and fits as JSON")
+    parser.add_argument("--plot", metavar="PATH", help="save the curves as an image")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    modes = MODES if args.mode == "both" else (args.mode,)
+    max_workers = args.workers or multiprocessing.cpu_count()
+
+    print("\n" + "="*60)
+    print(" STRONG AND WEAK SCALING")
+    print("="*60)
+    print(f"\n1 to {max_workers} workers on {multiprocessing.cpu_count()} cores, "
+          f"median of {args.repeat} runs")
+
+    study = scaling_study(args.kernels, modes, max_workers, args.repeat, args.scale, seed=42)
+    for (kernel, mode), curve in study["curves"].items():
+        n = int(WORK[kernel] * args.scale)
+        per = "in total" if mode == "strong" else "per worker"
+        print(f"\n[{kernel}, {mode}: {n:,} units {per}]")
+        print_scaling(curve)
+
+    print(f"\n  {'Kernel':<20} {'Amdahl s':>9} {'Gustafson s':>12} {'Max speedup':>12} "
+          f"{'50% eff. at':>12}")
+    for kernel, fit in study["fits"].items():
+        s_a, s_g = fit.get("amdahl"), fit.get("gustafson")
+        limit = f"{1 / s_a:.0f}x" if s_a else "-"
+        cores = f"{half_efficiency_cores(s_a):.0f} cores" if s_a else "-"
+        print(f"  {kernel:<20} {_fmt(s_a):>9} {_fmt(s_g):>12} {limit:>12} {cores:>12}")
+    print("\n  Beyond the 50%-efficiency core count, a bigger instance mostly buys idle cores")
+
+    if args.json:
+        rows = [stats for curve in study["curves"].values() for stats in curve]
+        save_json(rows, args.json, fits=study["fits"])
+        print(f"\n  Saved to {args.json}")
+    if args.plot:
+        try:
+            print(f"  Plot saved to {plot_study(study, args.plot)}")
+        except ImportError as e:
+            print(f"  {e}")
+    print("\n" + "="*60 + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Dynamic Load Balancing for Block-Based Monte Carlo Jobs
+
+Splitting a job into exactly n_workers equal chunks means the whole job
+waits for the slowest core. Instead, we hand out many smaller tasks:
+
+1. Start with one-block "probe" tasks to measure the time per block
+2. Size later tasks so each takes about TARGET_TASK_SECONDS
+3. Shrink tasks near the end so all workers finish together
+4. Give the next task to whichever worker finishes first
+
+Tasks are runs of whole blocks, and every block has its own random stream
+(rng_streams.py), so the result doesn't depend on how the work was split.
+
+Usage:
+    from functools import partial
+    from scheduler import run_blocks
+    task = partial(summarize_returns, method="tail", k=k, seed=seed)
+    results = run_blocks(executor, task, n_sims, block_size, n_workers)
+"""
+
+from concurrent.futures import FIRST_COMPLETED, wait
+import time
+
+from rng_streams import n_chunks
+
+TARGET_TASK_SECONDS = 0.25  # Long enough to hide scheduling overhead
+
+
+def timed_task(fn, n_sims, first_block):
+    """Worker side: run one task and report how long it took (no queue wait)"""
+    start = time.perf_counter()
+    result = fn(n_sims=n_sims, first_block=first_block)
+    return result, time.perf_counter() - start
+
+
+def run_blocks(executor, fn, n_sims, block_size, n_workers,
+               target_seconds=TARGET_TASK_SECONDS):
+    """
+    Run fn(n_sims=..., first_block=...) over exactly n_sims paths.
+
+    fn must be picklable (a module-level function or functools.partial).
+    Returns the task results in completion order.
+    """
+    total_blocks = n_chunks(n_sims, block_size)
+    next_block = 0
+    sec_per_block = None  # Unknown until the first task comes back
+    in_flight = {}
+    results = []
+    paths_done = 0
+
+    def submit(n_blocks):
+        nonlocal next_block
+        first = next_block
+        stop = min(first + n_blocks, total_blocks)
+        n_paths = min(stop * block_size, n_sims) - first * block_size
+        future = executor.submit(timed_task, fn, n_paths, first)
+        in_flight[future] = (stop - first, n_paths)
+        next_block = stop
+
+    def next_size():
+        if sec_per_block is None:
+            return 1  # Probe
+        by_time = max(1, int(target_seconds / sec_per_block))
+        # Guided scheduling: never take more than a share of what's left
+        remaining = total_blocks - next_block
+        return max(1, min(by_time, remaining // (2 * n_workers)))
+
+    # Keep two tasks per worker queued so nobody idles between tasks
+    while next_block < total_blocks and len(in_flight) < 2 * n_workers:
+        submit(1)
+
+    while in_flight:
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            n_blocks, n_paths = in_flight.pop(future)
+            result, elapsed = future.result()
+            results.append(result)
+            paths_done += n_paths
+
+            # Moving average of the measured cost per block
+            observed = elapsed / n_blocks
+            if sec_per_block is None:
+                sec_per_block = observed
+            else:
+                sec_per_block = 0.5 * sec_per_block + 0.5 * observed
+
+            if next_block < total_blocks:
+                submit(next_size())
+
+    if paths_done != n_sims:
+        raise RuntimeError(f"Simulated {paths_done:,} paths, expected {n_sims:,}")
+    return results